@@ -0,0 +1,36 @@
+"""
+Context Formatting Module
+Serializes dashboard context dicts into prompt text
+Backend Engineer: AI/ML Specialist
+
+Kept free of dynamic features so it can be compiled with mypyc
+(`mypyc backend/context_format.py`) without code changes.
+"""
+
+from typing import Any, Dict, List
+
+import orjson
+
+# Sorted keys make the same context produce the same bytes on every call
+CONTEXT_JSON_OPTIONS: int = (
+    orjson.OPT_INDENT_2
+    | orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_SERIALIZE_NUMPY
+    | orjson.OPT_SORT_KEYS
+)
+
+
+def format_context(context: Dict[str, Any]) -> str:
+    """
+    One "key: value" line per context entry, in key order; lists and dicts
+    are rendered as indented JSON.
+    """
+    formatted: List[str] = []
+    for key in sorted(context, key=str):
+        value = context[key]
+        if isinstance(value, (list, dict)):
+            rendered = orjson.dumps(value, default=str, option=CONTEXT_JSON_OPTIONS).decode()
+            formatted.append(f"{key}: {rendered}")
+        else:
+            formatted.append(f"{key}: {value}")
+    return "\n".join(formatted)
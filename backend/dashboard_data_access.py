@@ -1,12 +1,62 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
+import time
+import threading
 import logging
+from bisect import bisect_right
+from collections import Counter, defaultdict
 from data.pdf_loader import PDFDataLoader
+from backend.psa_knowledge_base import (
+    classify,
+    WAIT_TIME_EDGES,
+    WAIT_TIME_LABELS,
+    WAIT_TIME_CUTS,
+    WAIT_TIME_LEVELS,
+    ACCURACY_CUTS,
+    ACCURACY_LEVELS,
+    UTILIZATION_CUTS,
+    UTILIZATION_LEVELS
+)
 
 logger = logging.getLogger(__name__)
 
+# get_current_state results and the filter frame are reused for this long
+# (time.monotonic seconds)
+CACHE_TTL_SECONDS = 3.0
+
+# Wait time (hours) above which a vessel counts as delayed in analyze_delays
+DELAY_THRESHOLD_HOURS = 2
+
+# get_recommendations templates per focus area and knowledge-base level
+_RECOMMENDATION_TEMPLATES = {
+    "delays": {
+        "excellent": "Average wait of {value:.1f}h is within the 2-hour target - keep the current berth allocation",
+        "good": "Average wait of {value:.1f}h is close to the 2-hour target - review the next 24h arrival schedule",
+        "concerning": "Average wait of {value:.1f}h exceeds the 2-hour target - rebalance berth assignments toward idle berths",
+        "critical": "Average wait of {value:.1f}h is critical - fast-track departures and divert arrivals to available berths"
+    },
+    "efficiency": {
+        "excellent": "Arrival accuracy of {value:.1f}% - keep the current ETA coordination practices",
+        "good": "Arrival accuracy of {value:.1f}% - tighten berth allocation timing to reach 95%",
+        "needs_improvement": "Arrival accuracy of {value:.1f}% is below the 90% target - review ETA updates with shipping lines",
+        "poor": "Arrival accuracy of {value:.1f}% is well below target - audit ETA prediction and vessel-port communication"
+    },
+    "utilization": {
+        "underutilized": "Berth utilization of {value:.1f}% leaves spare capacity - schedule additional vessel calls",
+        "optimal": "Berth utilization of {value:.1f}% is in the 75-85% target band - maintain the current balance",
+        "congested": "Berth utilization of {value:.1f}% is high - stagger arrival windows and prepare overflow berths"
+    }
+}
+
 class DashboardDataAccess:
+    __slots__ = (
+        'db',
+        '_state_cache', '_state_cache_ts', '_state_lock',
+        '_frame_cache', '_frame_cache_ts', '_frame_lock'
+    )
+
     def __init__(self, db_manager=None):
         """
         If db_manager is None, fallback to dashboard's _create_sample_data().
@@ -15,6 +65,24 @@ class DashboardDataAccess:
             self.db = PDFDataLoader()  # uses _create_sample_data internally
         else:
             self.db = db_manager
+        
+        # Last dashboard state and when it was built
+        self._state_cache: Optional[Dict[str, Any]] = None
+        self._state_cache_ts = 0.0
+        self._state_lock = threading.Lock()
+        
+        # Vessels as one DataFrame for filtering (plus lowercased names),
+        # and when it was built
+        self._frame_cache: Optional[Tuple[pd.DataFrame, np.ndarray]] = None
+        self._frame_cache_ts = 0.0
+        self._frame_lock = threading.Lock()
+    
+    def invalidate(self):
+        """Drop cached results; call after writing to the underlying data source"""
+        with self._state_lock:
+            self._state_cache = None
+        with self._frame_lock:
+            self._frame_cache = None
 
     # --------------------------
     # Helper to fetch sample data
@@ -28,6 +96,41 @@ class DashboardDataAccess:
         else:
             return []
 
+    def _vessels_frame(self) -> pd.DataFrame:
+        """Cached vessels DataFrame; shared, never modify in place"""
+        return self._vessels_columns()[0]
+
+    def _vessels_columns(self) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Up to 1000 recent vessels as one DataFrame, built at most once per
+        CACHE_TTL_SECONDS so filter requests only apply masks to it, plus
+        the lowercased vessel names aligned with its rows.
+        Timestamps are parsed here, once. Shared: never modify in place.
+        """
+        with self._frame_lock:
+            now = time.monotonic()
+            if self._frame_cache is not None and now - self._frame_cache_ts < CACHE_TTL_SECONDS:
+                return self._frame_cache
+            df = pd.DataFrame(self._fetch_recent_vessels(limit=1000))
+            if 'atb' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['atb']):
+                # Explicit format keeps pandas on the vectorized ISO parser
+                df['atb'] = pd.to_datetime(df['atb'], format='ISO8601', cache=True, errors='coerce')
+            # Few distinct values: equality filters compare int codes
+            for column in ('status', 'berth'):
+                if column in df.columns:
+                    df[column] = df[column].astype('category')
+            # The column assignments above leave extra blocks behind; copy()
+            # consolidates each dtype into one block, where every column is
+            # a contiguous run for the summary reductions
+            df = df.copy()
+            if 'vessel_name' in df.columns:
+                names_lower = np.char.lower(df['vessel_name'].fillna('').to_numpy(dtype=str))
+            else:
+                names_lower = np.full(len(df), '')
+            self._frame_cache = (df, names_lower)
+            self._frame_cache_ts = now
+            return self._frame_cache
+
     def _fetch_current_metrics(self) -> Dict[str, Any]:
         """Return current metrics, using sample data fallback if needed"""
         if hasattr(self.db, "_create_sample_data"):
@@ -46,9 +149,11 @@ class DashboardDataAccess:
     def _fetch_berth_status(self) -> List[Dict[str, Any]]:
         """Return berth status, fallback to sample data if needed"""
         if hasattr(self.db, "_create_sample_data"):
-            vessels = self.db._create_sample_data()
-            berths = list({v.get("berth"): "Occupied" for v in vessels if v.get("berth")} )
-            return [{"berth_id": b, "status": "Occupied"} for b in berths]
+            # Berths seen in the cached vessels frame, deduplicated by unique()
+            df = self._vessels_frame()
+            if 'berth' not in df.columns:
+                return []
+            return [{"berth_id": b, "status": "Occupied"} for b in df['berth'].dropna().unique() if b]
         elif hasattr(self.db, "get_berth_availability"):
             return self.db.get_berth_availability()
         else:
@@ -58,11 +163,41 @@ class DashboardDataAccess:
     # Methods for AI dashboard
     # --------------------------
     def get_current_state(self) -> Dict[str, Any]:
+        """
+        Snapshot of vessels, KPIs and berths, rebuilt at most once per
+        CACHE_TTL_SECONDS. The returned dict is shared between
+        callers until it expires, so treat it as read-only.
+        """
+        with self._state_lock:
+            now = time.monotonic()
+            if self._state_cache is not None and now - self._state_cache_ts < CACHE_TTL_SECONDS:
+                return self._state_cache
+            state = self._build_current_state()
+            # Failures are not cached, so the next call retries
+            if "error" not in state:
+                self._state_cache = state
+                self._state_cache_ts = now
+            return state
+    
+    def _build_current_state(self) -> Dict[str, Any]:
         try:
             recent_vessels = self._fetch_recent_vessels(limit=100)
             performance_metrics = self._fetch_current_metrics()
             berth_status = self._fetch_berth_status()
 
+            # One pass over the berths for both lists and the utilization
+            available_berths = []
+            occupied_berths = []
+            for b in berth_status:
+                status = b['status']
+                if status == 'Available':
+                    available_berths.append(b['berth_id'])
+                elif status == 'Occupied':
+                    occupied_berths.append({
+                        "berth_id": b['berth_id'],
+                        "vessel": b.get('current_vessel_imo')
+                    })
+
             state = {
                 "timestamp": datetime.now().isoformat(),
                 "vessels": {
@@ -87,19 +222,13 @@ class DashboardDataAccess:
                     "total_movements": int(performance_metrics.get('total_movements', 0))
                 },
                 "berths": {
-                    "available": [b['berth_id'] for b in berth_status if b['status'] == 'Available'],
-                    "occupied": [
-                        {
-                            "berth_id": b['berth_id'],
-                            "vessel": b.get('current_vessel_imo')
-                        }
-                        for b in berth_status if b['status'] == 'Occupied'
-                    ],
-                    "total_utilization": self._calculate_utilization(berth_status)
+                    "available": available_berths,
+                    "occupied": occupied_berths,
+                    "total_utilization": self._calculate_utilization(len(occupied_berths), len(berth_status))
                 }
             }
 
-            logger.info(f"Dashboard state captured: {len(recent_vessels)} vessels, {len(berth_status)} berths")
+            logger.info("Dashboard state captured: %d vessels, %d berths", len(recent_vessels), len(berth_status))
             return state
         except Exception as e:
             logger.error(f"Error getting dashboard state: {e}")
@@ -108,45 +237,67 @@ class DashboardDataAccess:
     # --------------------------
     # Filtering & analysis
     # --------------------------
+    def _filter_df(self, filters: Dict[str, Any]) -> pd.DataFrame:
+        """Full filtered vessel frame (no row limit); callers must not modify it"""
+        df, names_lower = self._vessels_columns()
+        if df.empty:
+            return df
+
+        # Combine all filters into one row mask, then select once
+        mask = np.ones(len(df), dtype=bool)
+        if 'berth' in filters and filters['berth']:
+            mask &= (df['berth'] == filters['berth']).to_numpy()
+        if 'time_window_hours' in filters:
+            cutoff_time = datetime.now() - timedelta(hours=int(filters['time_window_hours']))
+            if 'atb' in df.columns:
+                mask &= (df['atb'] >= cutoff_time).to_numpy()
+        if 'status' in filters and filters['status']:
+            mask &= (df['status'] == filters['status']).to_numpy()
+        if 'vessel_name' in filters and filters['vessel_name']:
+            mask &= np.char.find(names_lower, str(filters['vessel_name']).lower()) >= 0
+        return df[mask]
+
+    def _to_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Frame rows as JSON-friendly dicts: NaN -> None, timestamps -> str"""
+        present = df.notna()
+        out = df.astype(object)
+        ts_cols = df.select_dtypes(include=['datetime', 'datetimetz']).columns
+        if len(ts_cols):
+            out[ts_cols] = df[ts_cols].astype(str)
+        return out.where(present, None).to_dict('records')
+
     def filter_data(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            all_vessels = self._fetch_recent_vessels(limit=1000)
-            df = pd.DataFrame(all_vessels)
+            df = self._filter_df(filters)
             if df.empty:
                 return {"count": 0, "data": [], "summary": {}}
 
-            # Apply filters
-            if 'berth' in filters and filters['berth']:
-                df = df[df['berth'] == filters['berth']]
-            if 'time_window_hours' in filters:
-                cutoff_time = datetime.now() - timedelta(hours=int(filters['time_window_hours']))
-                if 'atb' in df.columns:
-                    df['atb'] = pd.to_datetime(df['atb'])
-                    df = df[df['atb'] >= cutoff_time]
-            if 'status' in filters and filters['status']:
-                df = df[df['status'] == filters['status']]
-            if 'vessel_name' in filters and filters['vessel_name']:
-                df = df[df['vessel_name'].str.contains(filters['vessel_name'], case=False, na=False)]
-
             summary = {
                 "count": len(df),
-                "avg_wait_time": float(df['wait_time_atb_btr'].mean()) if 'wait_time_atb_btr' in df.columns and not df.empty else 0,
-                "max_wait_time": float(df['wait_time_atb_btr'].max()) if 'wait_time_atb_btr' in df.columns and not df.empty else 0,
-                "total_carbon_saved": float(df['carbon_abatement_tonnes'].sum()) if 'carbon_abatement_tonnes' in df.columns and not df.empty else 0,
-                "delayed_count": len(df[df['wait_time_atb_btr'] > 4]) if 'wait_time_atb_btr' in df.columns else 0
+                "avg_wait_time": 0,
+                "max_wait_time": 0,
+                "total_carbon_saved": 0,
+                "delayed_count": 0
             }
-
-            records = df.head(50).to_dict('records')
-            for record in records:
-                for key, value in record.items():
-                    if pd.isna(value):
-                        record[key] = None
-                    elif isinstance(value, (pd.Timestamp, datetime)):
-                        record[key] = str(value)
+            # All reductions in one agg call
+            agg_spec = {}
+            if 'wait_time_atb_btr' in df.columns:
+                agg_spec['wait_time_atb_btr'] = ['mean', 'max']
+            if 'carbon_abatement_tonnes' in df.columns:
+                agg_spec['carbon_abatement_tonnes'] = ['sum']
+            if agg_spec:
+                aggs = df.agg(agg_spec)
+                if 'wait_time_atb_btr' in agg_spec:
+                    wait = df['wait_time_atb_btr'].to_numpy()
+                    summary["avg_wait_time"] = float(aggs.at['mean', 'wait_time_atb_btr'])
+                    summary["max_wait_time"] = float(aggs.at['max', 'wait_time_atb_btr'])
+                    summary["delayed_count"] = int((wait > 4).sum())
+                if 'carbon_abatement_tonnes' in agg_spec:
+                    summary["total_carbon_saved"] = float(aggs.at['sum', 'carbon_abatement_tonnes'])
 
             return {
                 "count": len(df),
-                "data": records,
+                "data": self._to_records(df.head(50)),
                 "summary": summary,
                 "filters_applied": filters
             }
@@ -154,25 +305,144 @@ class DashboardDataAccess:
             logger.error(f"Error filtering data: {e}")
             return {"error": str(e), "count": 0, "data": []}
 
+    def analyze_delays(self, berth: Optional[str] = None, time_period: str = "24h") -> Dict[str, Any]:
+        """
+        Delayed vessels (wait above DELAY_THRESHOLD_HOURS) over the whole
+        filtered frame: totals, severity mix, per-berth counts, worst five
+        """
+        try:
+            hours = self._parse_time_period(time_period)
+            df = self._filter_df({"berth": berth, "time_window_hours": hours})
+            result = {
+                "berth": berth,
+                "time_period": time_period,
+                "vessels_analyzed": len(df),
+                "total_delays": 0,
+                "avg_delay_time": 0.0,
+                "max_delay_time": 0.0,
+                "delays_by_severity": {},
+                "delays_by_berth": {},
+                "worst_delays": []
+            }
+            if df.empty or 'wait_time_atb_btr' not in df.columns:
+                return result
+
+            # Plain numpy over the columns: one mask, then counts per code
+            wait_all = df['wait_time_atb_btr'].to_numpy(dtype=float)
+            delayed = wait_all > DELAY_THRESHOLD_HOURS
+            total_delays = int(np.count_nonzero(delayed))
+            if not total_delays:
+                return result
+
+            wait = wait_all[delayed]
+            severity = classify(wait, WAIT_TIME_EDGES, WAIT_TIME_LABELS)
+
+            # Worst five: partial selection on the array, then sort just those
+            k = min(5, total_delays)
+            top = np.argpartition(-wait, k - 1)[:k]
+            top = top[np.argsort(-wait[top], kind='stable')]
+            worst_rows = np.flatnonzero(delayed)[top]
+            worst_columns = [c for c in ('vessel_name', 'berth', 'wait_time_atb_btr', 'atb') if c in df.columns]
+
+            result.update({
+                "total_delays": total_delays,
+                "avg_delay_time": float(wait.mean()),
+                "max_delay_time": float(wait.max()),
+                "delays_by_severity": dict(Counter(severity)),
+                "delays_by_berth": self._count_by_berth(df, delayed),
+                "worst_delays": self._to_records(df.iloc[worst_rows][worst_columns])
+            })
+            return result
+        except Exception as e:
+            logger.error(f"Error analyzing delays: {e}")
+            return {"error": str(e), "total_delays": 0}
+
+    def _count_by_berth(self, df: pd.DataFrame, selected: np.ndarray) -> Dict[str, int]:
+        """Selected rows per berth, counted with bincount over the category codes"""
+        if 'berth' not in df.columns:
+            return {}
+        berths = df['berth'].cat
+        codes = berths.codes.to_numpy()[selected]
+        counts = np.bincount(codes[codes >= 0], minlength=len(berths.categories))
+        return {str(b): int(n) for b, n in zip(berths.categories, counts) if n}
+
+    def get_recommendations(self, focus_area: Optional[str] = None) -> List[str]:
+        """
+        Data-driven recommendations for one focus area (delays, efficiency,
+        utilization, carbon), based on the cached dashboard state
+        """
+        try:
+            state = self.get_current_state()
+            if "error" in state:
+                return []
+            performance = state["performance"]
+            berths = state["berths"]
+
+            if focus_area == "delays":
+                wait = performance["avg_wait_time"]
+                level = WAIT_TIME_LEVELS[bisect_right(WAIT_TIME_CUTS, wait)]
+                recommendations = [_RECOMMENDATION_TEMPLATES["delays"][level].format(value=wait)]
+                recommendations.extend(self._delay_hotspots())
+                return recommendations
+
+            if focus_area == "utilization":
+                util = berths["total_utilization"]
+                level = UTILIZATION_LEVELS[bisect_right(UTILIZATION_CUTS, util)]
+                recommendations = [_RECOMMENDATION_TEMPLATES["utilization"][level].format(value=util)]
+                if level == "congested" and berths["available"]:
+                    recommendations.append(f"Route the next arrivals to available berths: {', '.join(map(str, berths['available']))}")
+                return recommendations
+
+            if focus_area == "carbon":
+                carbon = performance["total_carbon_saved"]
+                return [
+                    f"{carbon:.1f} tonnes of carbon abated so far - shorter waits at anchor cut idle emissions further",
+                    "Promote just-in-time arrival for vessels with repeated long waits"
+                ]
+
+            # efficiency (and the default)
+            accuracy = performance["avg_arrival_accuracy"]
+            level = ACCURACY_LEVELS[bisect_right(ACCURACY_CUTS, accuracy)]
+            return [_RECOMMENDATION_TEMPLATES["efficiency"][level].format(value=accuracy)]
+        except Exception as e:
+            logger.error(f"Error building recommendations: {e}")
+            return []
+
+    def _delay_hotspots(self, top_n: int = 3) -> List[str]:
+        """Berths whose average wait is above DELAY_THRESHOLD_HOURS, worst first"""
+        df = self._vessels_frame()
+        if df.empty or 'berth' not in df.columns or 'wait_time_atb_btr' not in df.columns:
+            return []
+        avg_wait = df.groupby('berth', observed=True)['wait_time_atb_btr'].mean()
+        worst = avg_wait[avg_wait > DELAY_THRESHOLD_HOURS].nlargest(top_n)
+        return [
+            f"Prioritise berth {berth}: average wait {wait:.1f}h across recent calls"
+            for berth, wait in worst.items()
+        ]
+
+    def _parse_time_period(self, time_period: Optional[str]) -> int:
+        """'3h' / '24h' / '7d' -> hours; anything unparseable falls back to 24"""
+        period = (time_period or "24h").strip().lower()
+        try:
+            if period.endswith('d'):
+                return int(float(period[:-1]) * 24)
+            return int(float(period.rstrip('h')))
+        except ValueError:
+            return 24
+
     # --------------------------
     # Utility helpers
     # --------------------------
     def _group_by_status(self, vessels: List[Dict]) -> Dict[str, int]:
-        status_counts = {}
-        for vessel in vessels:
-            status = vessel.get('status', 'Unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
-        return status_counts
+        return dict(Counter(v.get('status', 'Unknown') for v in vessels))
 
     def _group_by_berth(self, vessels: List[Dict]) -> Dict[str, List[str]]:
-        berth_vessels = {}
+        berth_vessels = defaultdict(list)
         for vessel in vessels:
-            berth = vessel.get('berth', 'Unknown')
-            berth_vessels.setdefault(berth, []).append(vessel.get('vessel_name'))
-        return berth_vessels
+            berth_vessels[vessel.get('berth', 'Unknown')].append(vessel.get('vessel_name'))
+        return dict(berth_vessels)
 
-    def _calculate_utilization(self, berth_status: List[Dict]) -> float:
-        if not berth_status:
+    def _calculate_utilization(self, occupied: int, total: int) -> float:
+        if not total:
             return 0.0
-        occupied = len([b for b in berth_status if b['status'] == 'Occupied'])
-        return (occupied / len(berth_status)) * 100
+        return (occupied / total) * 100
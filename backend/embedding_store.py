@@ -0,0 +1,94 @@
+"""
+Embedding Store Module
+Persistent on-disk cache of embedding vectors
+Backend Engineer: AI/ML Specialist
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "embedding_cache.sqlite3")
+)
+
+# Stay under SQLite's bound-parameter limit on older builds
+_SELECT_CHUNK = 500
+
+
+class EmbeddingStore:
+    """
+    SQLite-backed embedding cache that survives Streamlit restarts.
+    Keys are content hashes that include the embedding deployment id, so
+    switching models never returns vectors from the old one.
+    Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vec BLOB NOT NULL,"
+            " created_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for whichever keys are present"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SELECT_CHUNK):
+                chunk = keys[start:start + _SELECT_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Insert or replace vectors in one transaction"""
+        if not items:
+            return
+        now = int(time.time())
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec, created_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counts since start-up and the number of stored vectors"""
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stored_vectors": stored,
+                "path": self.path
+            }
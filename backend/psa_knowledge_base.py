@@ -3,6 +3,15 @@ PSA Maritime Operations Knowledge Base
 Domain-specific rules, thresholds, and operational knowledge
 """
 
+import math
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
 # ============================================
 # PERFORMANCE THRESHOLDS
 # ============================================
@@ -37,72 +46,52 @@ PERFORMANCE_THRESHOLDS = {
 # BERTH CHARACTERISTICS
 # ============================================
 
-BERTH_CHARACTERISTICS = {
-    "B01": {
-        "terminal": "Terminal 1",
-        "type": "container",
-        "capacity": "large",
-        "max_vessel_size": 20000,
-        "max_draft": 16.0,
-        "equipment": "4 gantry cranes"
-    },
-    "B02": {
-        "terminal": "Terminal 1",
-        "type": "container",
-        "capacity": "large",
-        "max_vessel_size": 20000,
-        "max_draft": 16.0,
-        "equipment": "4 gantry cranes"
-    },
-    "B03": {
-        "terminal": "Terminal 2",
-        "type": "container",
-        "capacity": "medium",
-        "max_vessel_size": 18000,
-        "max_draft": 15.5,
-        "equipment": "3 gantry cranes"
-    },
-    "B04": {
-        "terminal": "Terminal 2",
-        "type": "container",
-        "capacity": "medium",
-        "max_vessel_size": 18000,
-        "max_draft": 15.5,
-        "equipment": "3 gantry cranes"
-    },
-    "B05": {
-        "terminal": "Terminal 3",
-        "type": "container",
-        "capacity": "large",
-        "max_vessel_size": 22000,
-        "max_draft": 17.0,
-        "equipment": "5 gantry cranes"
-    },
-    "B06": {
-        "terminal": "Terminal 3",
-        "type": "container",
-        "capacity": "large",
-        "max_vessel_size": 22000,
-        "max_draft": 17.0,
-        "equipment": "5 gantry cranes"
-    },
-    "B07": {
-        "terminal": "Terminal 4",
-        "type": "container",
-        "capacity": "small",
-        "max_vessel_size": 15000,
-        "max_draft": 14.0,
-        "equipment": "2 gantry cranes"
-    },
-    "B08": {
-        "terminal": "Terminal 4",
-        "type": "container",
-        "capacity": "small",
-        "max_vessel_size": 15000,
-        "max_draft": 14.0,
-        "equipment": "2 gantry cranes"
-    }
-}
+@dataclass(frozen=True, slots=True)
+class Berth:
+    """Static characteristics of one berth"""
+    berth_id: str
+    terminal: str
+    type: str
+    capacity: str
+    max_vessel_size: int  # TEU
+    max_draft: float      # metres
+    equipment: str
+
+
+BERTHS = (
+    Berth("B01", "Terminal 1", "container", "large", 20000, 16.0, "4 gantry cranes"),
+    Berth("B02", "Terminal 1", "container", "large", 20000, 16.0, "4 gantry cranes"),
+    Berth("B03", "Terminal 2", "container", "medium", 18000, 15.5, "3 gantry cranes"),
+    Berth("B04", "Terminal 2", "container", "medium", 18000, 15.5, "3 gantry cranes"),
+    Berth("B05", "Terminal 3", "container", "large", 22000, 17.0, "5 gantry cranes"),
+    Berth("B06", "Terminal 3", "container", "large", 22000, 17.0, "5 gantry cranes"),
+    Berth("B07", "Terminal 4", "container", "small", 15000, 14.0, "2 gantry cranes"),
+    Berth("B08", "Terminal 4", "container", "small", 15000, 14.0, "2 gantry cranes"),
+)
+
+BERTH_CHARACTERISTICS = MappingProxyType({b.berth_id: b for b in BERTHS})
+
+# berth_id -> capacity class, for one-lookup capacity checks
+_BERTH_CAPACITY = {b.berth_id: b.capacity for b in BERTHS}
+
+# Column arrays parallel to BERTHS for vectorized fit queries
+BERTH_MAX_VESSEL_SIZE = np.array([b.max_vessel_size for b in BERTHS], dtype=np.int32)
+BERTH_MAX_DRAFT = np.array([b.max_draft for b in BERTHS])
+
+
+def berths_accepting(vessel_size: int, draft: float = 0.0) -> tuple:
+    """
+    Berths that can take a vessel of the given size and draft
+    
+    Args:
+        vessel_size: Vessel size in TEU
+        draft: Vessel draft in metres
+        
+    Returns:
+        Tuple of matching Berth entries, in BERTHS order
+    """
+    fits = (BERTH_MAX_VESSEL_SIZE >= vessel_size) & (BERTH_MAX_DRAFT >= draft)
+    return tuple(BERTHS[i] for i in np.flatnonzero(fits))
 
 # ============================================
 # OPERATIONAL INSIGHTS
@@ -147,7 +136,137 @@ STAKEHOLDER_PROFILES = {
 # INTERPRETATION FUNCTIONS
 # ============================================
 
-def interpret_wait_time(hours: float) -> dict:
+# Interpreters return shared read-only mappings, memoized per level and
+# per value rounded to 0.1 (the precision shown in the messages).
+
+def _threshold_buckets(family: str, inclusive: bool) -> tuple:
+    """
+    Sorted cut points and levels for one PERFORMANCE_THRESHOLDS family.
+    A value equal to a cut falls in the bucket above it. With inclusive
+    ranges a shared bound belongs to the level listed first, so when that
+    is the lower level the cut is nudged just above the bound. Level
+    names are interned so table lookups and comparisons hit the identity
+    fast path.
+    """
+    ranges = PERFORMANCE_THRESHOLDS[family]
+    listed = list(ranges)
+    levels = tuple(sys.intern(level) for level in sorted(ranges, key=lambda level: ranges[level][0]))
+    cuts = []
+    for below, above in zip(levels, levels[1:]):
+        cut = float(ranges[above][0])
+        if inclusive and listed.index(below) < listed.index(above):
+            cut = math.nextafter(cut, math.inf)
+        cuts.append(cut)
+    return tuple(cuts), levels
+
+
+# Bucket cut points and levels per threshold family, derived once from
+# PERFORMANCE_THRESHOLDS. Scalars are bucketed with bisect_right on the
+# tuples. Wait-time ranges are half-open, the percentage ones inclusive.
+WAIT_TIME_CUTS, WAIT_TIME_LEVELS = _threshold_buckets("wait_time", inclusive=False)
+ACCURACY_CUTS, ACCURACY_LEVELS = _threshold_buckets("arrival_accuracy", inclusive=True)
+UTILIZATION_CUTS, UTILIZATION_LEVELS = _threshold_buckets("berth_utilization", inclusive=True)
+
+# The same buckets as numpy arrays, for classify() over whole columns
+WAIT_TIME_EDGES = np.array(WAIT_TIME_CUTS)
+WAIT_TIME_LABELS = np.array(WAIT_TIME_LEVELS, dtype=object)
+
+ACCURACY_EDGES = np.array(ACCURACY_CUTS)
+ACCURACY_LABELS = np.array(ACCURACY_LEVELS, dtype=object)
+
+UTILIZATION_EDGES = np.array(UTILIZATION_CUTS)
+UTILIZATION_LABELS = np.array(UTILIZATION_LEVELS, dtype=object)
+
+
+def classify(values, edges: np.ndarray, labels: np.ndarray):
+    """
+    Bucket a value, or a whole array of values, into level labels
+    
+    Args:
+        values: Scalar or array-like of measurements
+        edges: Sorted bucket edges (len(labels) - 1 of them)
+        labels: Level label per bucket
+        
+    Returns:
+        The label for a scalar, or an array of labels
+    """
+    return labels[np.searchsorted(edges, values, side="right")]
+
+
+def classify_utilization_batch(utilization) -> np.ndarray:
+    """Utilization level for every value of an array-like (e.g. a DataFrame column)"""
+    return classify(utilization, UTILIZATION_EDGES, UTILIZATION_LABELS)
+
+
+# Icons and message templates per level, filled in with the measured value
+_WAIT_TIME_ICONS = {
+    "excellent": "✅",
+    "good": "✅",
+    "concerning": "⚠️",
+    "critical": "🚨"
+}
+_WAIT_TIME_MESSAGES = {
+    "excellent": "Wait time of {value:.1f} hours is excellent - well below the 2-hour target",
+    "good": "Wait time of {value:.1f} hours is acceptable but trending toward target limit",
+    "concerning": "Wait time of {value:.1f} hours exceeds target (2 hours) - attention needed",
+    "critical": "Wait time of {value:.1f} hours is CRITICAL - immediate action required"
+}
+
+_ACCURACY_ICONS = {
+    "excellent": "✅",
+    "good": "✅",
+    "needs_improvement": "⚠️",
+    "poor": "🔴"
+}
+_ACCURACY_MESSAGES = {
+    "excellent": "Arrival accuracy of {value:.1f}% is excellent - exceeding 95% target",
+    "good": "Arrival accuracy of {value:.1f}% is good - meeting 90% target",
+    "needs_improvement": "Arrival accuracy of {value:.1f}% needs improvement - below 90% target",
+    "poor": "Arrival accuracy of {value:.1f}% is poor - significantly below 90% target"
+}
+
+_UTILIZATION_ICONS = {
+    "optimal": "✅",
+    "underutilized": "📉",
+    "congested": "⚠️"
+}
+_UTILIZATION_MESSAGES = {
+    "optimal": "Berth utilization of {value:.1f}% is optimal (target: 75-85%)",
+    "underutilized": "Berth utilization of {value:.1f}% indicates underutilization - opportunity to increase throughput",
+    "congested": "Berth utilization of {value:.1f}% is high - risk of congestion and delays"
+}
+
+# Levels that need action, per family
+_ACTION_WAIT = frozenset({"concerning", "critical"})
+_ACTION_ACCURACY = frozenset({"needs_improvement", "poor"})
+_ACTION_UTILIZATION = frozenset({"underutilized", "congested"})
+
+# Per family: icons, message templates, levels that need action
+_INTERPRETATION_TABLES = {
+    "wait_time": (_WAIT_TIME_ICONS, _WAIT_TIME_MESSAGES, _ACTION_WAIT),
+    "arrival_accuracy": (_ACCURACY_ICONS, _ACCURACY_MESSAGES, _ACTION_ACCURACY),
+    "berth_utilization": (_UTILIZATION_ICONS, _UTILIZATION_MESSAGES, _ACTION_UTILIZATION)
+}
+
+_UNKNOWN_WAIT_TIME = MappingProxyType({"level": "unknown", "icon": "❓", "message": "Wait time data unavailable"})
+_UNKNOWN_ACCURACY = MappingProxyType({"level": "unknown", "icon": "❓", "message": "Arrival accuracy data unavailable"})
+_UNKNOWN_UTILIZATION = MappingProxyType({"level": "unknown", "icon": "❓", "message": "Utilization data unavailable"})
+
+
+@lru_cache(maxsize=512)
+def _interpretation(family: str, level: str, tenths: int) -> MappingProxyType:
+    """Build (once) the interpretation for a level and a value in tenths"""
+    icons, messages, action_levels = _INTERPRETATION_TABLES[family]
+    return MappingProxyType({
+        "level": level,
+        "icon": icons[level],
+        "message": messages[level].format(value=tenths / 10),
+        "action_needed": level in action_levels,
+        "severity": level
+    })
+
+
+def interpret_wait_time(hours: float) -> MappingProxyType:
     """
     Interpret wait time with industry context
     
@@ -155,36 +274,17 @@ def interpret_wait_time(hours: float) -> dict:
         hours: Wait time in hours
         
     Returns:
-        Dictionary with interpretation details
-    """
-    for level, (min_val, max_val) in PERFORMANCE_THRESHOLDS["wait_time"].items():
-        if min_val <= hours < max_val:
-            icons = {
-                "excellent": "✅",
-                "good": "✅", 
-                "concerning": "⚠️",
-                "critical": "🚨"
-            }
-            
-            messages = {
-                "excellent": f"Wait time of {hours:.1f} hours is excellent - well below the 2-hour target",
-                "good": f"Wait time of {hours:.1f} hours is acceptable but trending toward target limit",
-                "concerning": f"Wait time of {hours:.1f} hours exceeds target (2 hours) - attention needed",
-                "critical": f"Wait time of {hours:.1f} hours is CRITICAL - immediate action required"
-            }
-            
-            return {
-                "level": level,
-                "icon": icons[level],
-                "message": messages[level],
-                "action_needed": level in ["concerning", "critical"],
-                "severity": level
-            }
+        Read-only mapping with interpretation details
+    """
+    # inf passes the range check but cannot be rounded to tenths
+    if not (hours >= 0 and math.isfinite(hours)):
+        return _UNKNOWN_WAIT_TIME
     
-    return {"level": "unknown", "icon": "❓", "message": "Wait time data unavailable"}
+    level = WAIT_TIME_LEVELS[bisect_right(WAIT_TIME_CUTS, hours)]
+    return _interpretation("wait_time", level, round(hours * 10))
 
 
-def interpret_arrival_accuracy(accuracy: float) -> dict:
+def interpret_arrival_accuracy(accuracy: float) -> MappingProxyType:
     """
     Interpret arrival accuracy with industry benchmarks
     
@@ -192,36 +292,16 @@ def interpret_arrival_accuracy(accuracy: float) -> dict:
         accuracy: Arrival accuracy percentage (0-100)
         
     Returns:
-        Dictionary with interpretation details
-    """
-    for level, (min_val, max_val) in PERFORMANCE_THRESHOLDS["arrival_accuracy"].items():
-        if min_val <= accuracy <= max_val:
-            icons = {
-                "excellent": "✅",
-                "good": "✅",
-                "needs_improvement": "⚠️",
-                "poor": "🔴"
-            }
-            
-            messages = {
-                "excellent": f"Arrival accuracy of {accuracy:.1f}% is excellent - exceeding 95% target",
-                "good": f"Arrival accuracy of {accuracy:.1f}% is good - meeting 90% target",
-                "needs_improvement": f"Arrival accuracy of {accuracy:.1f}% needs improvement - below 90% target",
-                "poor": f"Arrival accuracy of {accuracy:.1f}% is poor - significantly below 90% target"
-            }
-            
-            return {
-                "level": level,
-                "icon": icons[level],
-                "message": messages[level],
-                "action_needed": level in ["needs_improvement", "poor"],
-                "severity": level
-            }
+        Read-only mapping with interpretation details
+    """
+    if not 0 <= accuracy <= 100:
+        return _UNKNOWN_ACCURACY
     
-    return {"level": "unknown", "icon": "❓", "message": "Arrival accuracy data unavailable"}
+    level = ACCURACY_LEVELS[bisect_right(ACCURACY_CUTS, accuracy)]
+    return _interpretation("arrival_accuracy", level, round(accuracy * 10))
 
 
-def interpret_berth_utilization(utilization: float) -> dict:
+def interpret_berth_utilization(utilization: float) -> MappingProxyType:
     """
     Interpret berth utilization rate
     
@@ -229,34 +309,156 @@ def interpret_berth_utilization(utilization: float) -> dict:
         utilization: Utilization percentage (0-100)
         
     Returns:
-        Dictionary with interpretation details
-    """
-    for level, (min_val, max_val) in PERFORMANCE_THRESHOLDS["berth_utilization"].items():
-        if min_val <= utilization <= max_val:
-            icons = {
-                "optimal": "✅",
-                "underutilized": "📉",
-                "congested": "⚠️"
-            }
-            
-            messages = {
-                "optimal": f"Berth utilization of {utilization:.1f}% is optimal (target: 75-85%)",
-                "underutilized": f"Berth utilization of {utilization:.1f}% indicates underutilization - opportunity to increase throughput",
-                "congested": f"Berth utilization of {utilization:.1f}% is high - risk of congestion and delays"
-            }
-            
-            return {
-                "level": level,
-                "icon": icons[level],
-                "message": messages[level],
-                "action_needed": level != "optimal",
-                "severity": level
-            }
+        Read-only mapping with interpretation details
+    """
+    if not 0 <= utilization <= 100:
+        return _UNKNOWN_UTILIZATION
     
-    return {"level": "unknown", "icon": "❓", "message": "Utilization data unavailable"}
+    level = UTILIZATION_LEVELS[bisect_right(UTILIZATION_CUTS, utilization)]
+    return _interpretation("berth_utilization", level, round(utilization * 10))
 
 
-def get_recommendations_for_wait_time(wait_time: float, berth: str = None, vessel_count: int = 0) -> list:
+# Batch interpreters: whole columns at once, for table rendering.
+# Per family the level, icon, message prefix/suffix (around the value) and
+# action flag arrays, with a trailing "unknown" slot for invalid values.
+def _batch_table(family: str, levels: tuple, unknown: MappingProxyType) -> tuple:
+    icons, messages, action_levels = _INTERPRETATION_TABLES[family]
+    parts = [messages[level].partition("{value:.1f}") for level in levels]
+    return (
+        np.array(levels + ("unknown",), dtype=object),
+        np.array([icons[level] for level in levels] + [unknown["icon"]]),
+        np.array([prefix for prefix, _, _ in parts] + [unknown["message"]]),
+        np.array([suffix for _, _, suffix in parts] + [""]),
+        np.array([level in action_levels for level in levels] + [False])
+    )
+
+
+_WAIT_TIME_BATCH = _batch_table("wait_time", WAIT_TIME_LEVELS, _UNKNOWN_WAIT_TIME)
+_ACCURACY_BATCH = _batch_table("arrival_accuracy", ACCURACY_LEVELS, _UNKNOWN_ACCURACY)
+_UTILIZATION_BATCH = _batch_table("berth_utilization", UTILIZATION_LEVELS, _UNKNOWN_UTILIZATION)
+
+
+def _interpret_batch(values: np.ndarray, edges: np.ndarray, table: tuple, valid: np.ndarray) -> dict:
+    levels, icons, prefixes, suffixes, actions = table
+    idx = np.where(valid, np.digitize(values, edges), len(levels) - 1)
+    shown = np.where(valid, np.char.mod("%.1f", values), "")
+    level = levels[idx]
+    return {
+        "level": level,
+        "icon": icons[idx],
+        "message": np.char.add(np.char.add(prefixes[idx], shown), suffixes[idx]),
+        "action_needed": actions[idx],
+        "severity": level
+    }
+
+
+def interpret_wait_time_batch(hours) -> dict:
+    """
+    Vectorized interpret_wait_time, e.g.
+    df.assign(**interpret_wait_time_batch(df['wait_time_atb_btr'].to_numpy()))
+    
+    Args:
+        hours: Array-like of wait times in hours
+        
+    Returns:
+        Dictionary of arrays (level, icon, message, action_needed, severity)
+    """
+    hours = np.asarray(hours, dtype=float)
+    return _interpret_batch(hours, WAIT_TIME_EDGES, _WAIT_TIME_BATCH, (hours >= 0) & np.isfinite(hours))
+
+
+def interpret_arrival_accuracy_batch(accuracy) -> dict:
+    """
+    Vectorized interpret_arrival_accuracy
+    
+    Args:
+        accuracy: Array-like of arrival accuracy percentages (0-100)
+        
+    Returns:
+        Dictionary of arrays (level, icon, message, action_needed, severity)
+    """
+    accuracy = np.asarray(accuracy, dtype=float)
+    return _interpret_batch(accuracy, ACCURACY_EDGES, _ACCURACY_BATCH, (accuracy >= 0) & (accuracy <= 100))
+
+
+def interpret_berth_utilization_batch(utilization) -> dict:
+    """
+    Vectorized interpret_berth_utilization
+    
+    Args:
+        utilization: Array-like of utilization percentages (0-100)
+        
+    Returns:
+        Dictionary of arrays (level, icon, message, action_needed, severity)
+    """
+    utilization = np.asarray(utilization, dtype=float)
+    return _interpret_batch(utilization, UTILIZATION_EDGES, _UTILIZATION_BATCH, (utilization >= 0) & (utilization <= 100))
+
+
+# Recommendation texts, built once. Each bucket maps to a fixed tuple of
+# templates; only the numbers and names are filled in with str.format.
+_WAIT_MULTIPLE_VESSELS_TMPL = "Multiple vessels affected ({count}) - coordinate with port authority for emergency capacity"
+_WAIT_SMALL_BERTH_TMPL = "Note: {berth} has limited capacity - consider redirecting to larger berths (B01, B02, B05, B06)"
+
+# Wait time buckets: <= 2h, > 2h, > 4h, > 6h
+_WAIT_REC_CUTS = (2.0, 4.0, 6.0)
+_WAIT_RECOMMENDATIONS = (
+    ("✅ Wait time within target - maintain current operations",),
+    (
+        "Monitor {target} - wait time trending above 2-hour target",
+        "Preventive action: Review upcoming schedule for potential congestion",
+    ),
+    (
+        "⚠️ HIGH PRIORITY: {wait:.1f}h wait time{at_berth} - Monitor closely and accelerate operations",
+        "Consider: Optimizing berth allocation, adjusting vessel arrival schedule",
+    ),
+    (
+        "🚨 CRITICAL: {wait:.1f}h wait time{at_berth} - Expedite current operations immediately",
+        "Emergency actions: Fast-track departures, consider reassignment to alternative berths",
+    ),
+)
+
+# Accuracy buckets: < 85%, < 90%, < 95%, >= 95%
+_ACCURACY_REC_CUTS = (85.0, 90.0, 95.0)
+_ACCURACY_RECOMMENDATIONS = (
+    (
+        "🔴 POOR PERFORMANCE: {accuracy:.1f}% arrival accuracy{for_vessel}",
+        "Root cause analysis needed: Check ETA prediction models, weather routing, communication protocols",
+        "Immediate actions: Improve vessel-port communication, enhance traffic monitoring",
+    ),
+    (
+        "⚠️ BELOW TARGET: {accuracy:.1f}% arrival accuracy{for_vessel} - target is 90%+",
+        "Suggestions: Review ETA calculation methods, improve weather forecast integration",
+    ),
+    (
+        "✅ GOOD: {accuracy:.1f}% arrival accuracy - slight room for improvement",
+        "Fine-tuning opportunity: Optimize last-mile navigation, refine berth allocation timing",
+    ),
+    ("✅ EXCELLENT: {accuracy:.1f}% arrival accuracy - maintain current practices",),
+)
+
+# Utilization buckets: < 70%, 70-85%, > 85%, > 90%
+_UTILIZATION_REC_CUTS = (85.0, 90.0)
+_UTILIZATION_RECOMMENDATIONS = (
+    (
+        "📉 UNDERUTILIZED: {utilization:.1f}% - opportunity to increase throughput",
+        "Opportunities: Attract additional vessel calls, reduce turnaround time, optimize scheduling",
+        "Potential gain: {gap:.1f}% capacity available = ~{extra_vessels} additional vessels per day",
+    ),
+    ("✅ OPTIMAL: {utilization:.1f}% utilization - maintain current balance",),
+    (
+        "⚠️ APPROACHING CAPACITY: {utilization:.1f}% utilization",
+        "Monitor closely and prepare contingency plans",
+    ),
+    (
+        "⚠️ HIGH UTILIZATION: {utilization:.1f}% - risk of congestion",
+        "Actions: Implement arrival time windows, optimize turnaround times, prepare overflow plans",
+        "Consider: Dynamic berth allocation, express lanes for fast turnaround vessels",
+    ),
+)
+
+
+def get_recommendations_for_wait_time(wait_time: float, berth: str = None, vessel_count: int = 0) -> tuple:
     """
     Generate specific recommendations based on wait time
     
@@ -266,36 +468,23 @@ def get_recommendations_for_wait_time(wait_time: float, berth: str = None, vesse
         vessel_count: Number of vessels affected
         
     Returns:
-        List of actionable recommendations
+        Tuple of actionable recommendations
     """
-    recommendations = []
-    berth_str = f" at {berth}" if berth else ""
+    bucket = bisect_left(_WAIT_REC_CUTS, wait_time)
+    recommendations = tuple(
+        msg.format(wait=wait_time, at_berth=" at " + berth if berth else "", target=berth or 'operations')
+        for msg in _WAIT_RECOMMENDATIONS[bucket]
+    )
     
-    if wait_time > 6:
-        recommendations.append(f"🚨 CRITICAL: {wait_time:.1f}h wait time{berth_str} - Expedite current operations immediately")
-        recommendations.append(f"Emergency actions: Fast-track departures, consider reassignment to alternative berths")
-        if vessel_count > 3:
-            recommendations.append(f"Multiple vessels affected ({vessel_count}) - coordinate with port authority for emergency capacity")
-    
-    elif wait_time > 4:
-        recommendations.append(f"⚠️ HIGH PRIORITY: {wait_time:.1f}h wait time{berth_str} - Monitor closely and accelerate operations")
-        recommendations.append(f"Consider: Optimizing berth allocation, adjusting vessel arrival schedule")
-        if berth:
-            berth_info = BERTH_CHARACTERISTICS.get(berth, {})
-            if berth_info.get('capacity') == 'small':
-                recommendations.append(f"Note: {berth} has limited capacity - consider redirecting to larger berths (B01, B02, B05, B06)")
-    
-    elif wait_time > 2:
-        recommendations.append(f"Monitor {berth if berth else 'operations'} - wait time trending above 2-hour target")
-        recommendations.append(f"Preventive action: Review upcoming schedule for potential congestion")
-    
-    else:
-        recommendations.append(f"✅ Wait time within target - maintain current operations")
+    if bucket == 3 and vessel_count > 3:
+        recommendations += (_WAIT_MULTIPLE_VESSELS_TMPL.format(count=vessel_count),)
+    elif bucket == 2 and _BERTH_CAPACITY.get(berth) == 'small':
+        recommendations += (_WAIT_SMALL_BERTH_TMPL.format(berth=berth),)
     
     return recommendations
 
 
-def get_recommendations_for_accuracy(accuracy: float, vessel_name: str = None) -> list:
+def get_recommendations_for_accuracy(accuracy: float, vessel_name: str = None) -> tuple:
     """
     Generate recommendations for arrival accuracy improvement
     
@@ -304,31 +493,17 @@ def get_recommendations_for_accuracy(accuracy: float, vessel_name: str = None) -
         vessel_name: Specific vessel (optional)
         
     Returns:
-        List of recommendations
+        Tuple of recommendations
     """
-    recommendations = []
-    vessel_str = f" for {vessel_name}" if vessel_name else ""
-    
-    if accuracy < 85:
-        recommendations.append(f"🔴 POOR PERFORMANCE: {accuracy:.1f}% arrival accuracy{vessel_str}")
-        recommendations.append(f"Root cause analysis needed: Check ETA prediction models, weather routing, communication protocols")
-        recommendations.append(f"Immediate actions: Improve vessel-port communication, enhance traffic monitoring")
-    
-    elif accuracy < 90:
-        recommendations.append(f"⚠️ BELOW TARGET: {accuracy:.1f}% arrival accuracy{vessel_str} - target is 90%+")
-        recommendations.append(f"Suggestions: Review ETA calculation methods, improve weather forecast integration")
-    
-    elif accuracy < 95:
-        recommendations.append(f"✅ GOOD: {accuracy:.1f}% arrival accuracy - slight room for improvement")
-        recommendations.append(f"Fine-tuning opportunity: Optimize last-mile navigation, refine berth allocation timing")
-    
-    else:
-        recommendations.append(f"✅ EXCELLENT: {accuracy:.1f}% arrival accuracy - maintain current practices")
-    
-    return recommendations
+    bucket = bisect_right(_ACCURACY_REC_CUTS, accuracy)
+    for_vessel = " for " + vessel_name if vessel_name else ""
+    return tuple(
+        msg.format(accuracy=accuracy, for_vessel=for_vessel)
+        for msg in _ACCURACY_RECOMMENDATIONS[bucket]
+    )
 
 
-def get_recommendations_for_utilization(utilization: float) -> list:
+def get_recommendations_for_utilization(utilization: float) -> tuple:
     """
     Generate recommendations for berth utilization
     
@@ -336,67 +511,133 @@ def get_recommendations_for_utilization(utilization: float) -> list:
         utilization: Utilization percentage
         
     Returns:
-        List of recommendations
+        Tuple of recommendations
     """
-    recommendations = []
-    
-    if utilization > 90:
-        recommendations.append(f"⚠️ HIGH UTILIZATION: {utilization:.1f}% - risk of congestion")
-        recommendations.append(f"Actions: Implement arrival time windows, optimize turnaround times, prepare overflow plans")
-        recommendations.append(f"Consider: Dynamic berth allocation, express lanes for fast turnaround vessels")
-    
-    elif utilization > 85:
-        recommendations.append(f"⚠️ APPROACHING CAPACITY: {utilization:.1f}% utilization")
-        recommendations.append(f"Monitor closely and prepare contingency plans")
-    
-    elif utilization < 70:
-        recommendations.append(f"📉 UNDERUTILIZED: {utilization:.1f}% - opportunity to increase throughput")
-        recommendations.append(f"Opportunities: Attract additional vessel calls, reduce turnaround time, optimize scheduling")
+    if utilization < 70:
         gap = 80 - utilization
-        recommendations.append(f"Potential gain: {gap:.1f}% capacity available = ~{int(gap/4)} additional vessels per day")
-    
+        fields = {'utilization': utilization, 'gap': gap, 'extra_vessels': int(gap/4)}
+        bucket = 0
     else:
-        recommendations.append(f"✅ OPTIMAL: {utilization:.1f}% utilization - maintain current balance")
+        fields = {'utilization': utilization}
+        bucket = 1 + bisect_left(_UTILIZATION_REC_CUTS, utilization)
     
-    return recommendations
+    return tuple(msg.format(**fields) for msg in _UTILIZATION_RECOMMENDATIONS[bucket])
+
 
+# Batch recommendations: each distinct value is built once with the scalar
+# function above and rows sharing a value share one tuple. The key is the
+# exact value, since the templates use more than its 0.1 rounding
+# (e.g. the extra vessel count in the utilization advice).
+def _recommendations_per_unique(values: np.ndarray, build) -> list:
+    _, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+    built = [build(float(values[i])) for i in first]
+    return [built[i] for i in inverse]
 
-def get_berth_specific_insights(berth_id: str) -> dict:
+
+def get_recommendations_for_wait_time_batch(wait_times, berth: str = None, vessel_count: int = 0) -> list:
     """
-    Get specific insights about a berth
+    get_recommendations_for_wait_time for a whole array of wait times
     
     Args:
-        berth_id: Berth identifier (e.g., 'B02')
+        wait_times: Array-like of wait times in hours
+        berth: Specific berth (optional)
+        vessel_count: Number of vessels affected
         
     Returns:
-        Dictionary with berth characteristics and insights
+        One recommendation tuple per input value
+    """
+    wait = np.asarray(wait_times, dtype=float)
+    return _recommendations_per_unique(
+        wait, lambda value: get_recommendations_for_wait_time(value, berth, vessel_count)
+    )
+
+
+def get_recommendations_for_accuracy_batch(accuracies, vessel_name: str = None) -> list:
     """
-    berth_info = BERTH_CHARACTERISTICS.get(berth_id, {})
+    get_recommendations_for_accuracy for a whole array of accuracies
     
-    if not berth_info:
-        return {"error": f"Berth {berth_id} not found in database"}
+    Args:
+        accuracies: Array-like of arrival accuracy percentages
+        vessel_name: Specific vessel (optional)
+        
+    Returns:
+        One recommendation tuple per input value
+    """
+    accuracy = np.asarray(accuracies, dtype=float)
+    return _recommendations_per_unique(
+        accuracy, lambda value: get_recommendations_for_accuracy(value, vessel_name)
+    )
+
+
+def get_recommendations_for_utilization_batch(utilizations) -> list:
+    """
+    get_recommendations_for_utilization for a whole array of utilizations
     
-    # Generate insights
+    Args:
+        utilizations: Array-like of utilization percentages
+        
+    Returns:
+        One recommendation tuple per input value
+    """
+    utilization = np.asarray(utilizations, dtype=float)
+    return _recommendations_per_unique(utilization, get_recommendations_for_utilization)
+
+
+def _build_berth_insights(berth: Berth) -> MappingProxyType:
+    """Insight payload for one berth; berths are static, so built at import"""
+    characteristics = asdict(berth)
+    del characteristics["berth_id"]
     insights = {
-        "id": berth_id,
-        "characteristics": berth_info,
-        "capabilities": f"Can handle vessels up to {berth_info.get('max_vessel_size', 0):,} TEU with max draft {berth_info.get('max_draft', 0)}m",
-        "equipment": berth_info.get('equipment', 'Unknown'),
-        "capacity_class": berth_info.get('capacity', 'Unknown').upper(),
-        "terminal": berth_info.get('terminal', 'Unknown')
+        "id": berth.berth_id,
+        "characteristics": MappingProxyType(characteristics),
+        "capabilities": f"Can handle vessels up to {berth.max_vessel_size:,} TEU with max draft {berth.max_draft}m",
+        "equipment": berth.equipment,
+        "capacity_class": berth.capacity.upper(),
+        "terminal": berth.terminal
     }
     
     # Add recommendations based on capacity
-    if berth_info.get('capacity') == 'large':
+    if berth.capacity == 'large':
         insights['best_for'] = "Ultra-large container vessels (ULCV), priority shipments"
-    elif berth_info.get('capacity') == 'medium':
+    elif berth.capacity == 'medium':
         insights['best_for'] = "Standard container vessels, regional services"
     else:
         insights['best_for'] = "Smaller vessels, feeder services, quick turnarounds"
     
+    return MappingProxyType(insights)
+
+
+_BERTH_INSIGHTS = {berth.berth_id: _build_berth_insights(berth) for berth in BERTHS}
+
+
+def get_berth_specific_insights(berth_id: str):
+    """
+    Get specific insights about a berth
+    
+    Args:
+        berth_id: Berth identifier (e.g., 'B02')
+        
+    Returns:
+        Read-only mapping with berth characteristics and insights,
+        or a dictionary with an "error" entry for unknown berths
+    """
+    insights = _BERTH_INSIGHTS.get(berth_id)
+    
+    if insights is None:
+        return {"error": f"Berth {berth_id} not found in database"}
+    
     return insights
 
 
+# Per tonne of CO2: trees planted (~46.5 per tonne annually), cars off the
+# road (~4.6 t/year each), homes' energy (~7.5 t/year each)
+_CARBON_FACTORS = (46.5, 1 / 4.6, 1 / 7.5)
+
+# Annual projection / period savings needed for the 20% and 15% targets
+_CARBON_EXCELLENT_RATIO = 12 * 0.20
+_CARBON_GOOD_RATIO = 12 * 0.15
+
+
 def get_carbon_insights(carbon_saved: float, period_days: int = 30) -> dict:
     """
     Provide context on carbon savings
@@ -409,8 +650,10 @@ def get_carbon_insights(carbon_saved: float, period_days: int = 30) -> dict:
         Dictionary with carbon insights and equivalents
     """
     # Calculate equivalents
-    trees_equivalent = int(carbon_saved * 46.5)  # 1 tonne CO2 = ~46.5 trees annually
-    cars_equivalent = int(carbon_saved / 4.6)     # 1 car = ~4.6 tonnes CO2/year
+    trees_factor, cars_factor, homes_factor = _CARBON_FACTORS
+    trees_equivalent = int(carbon_saved * trees_factor)
+    cars_equivalent = int(carbon_saved * cars_factor)
+    homes_equivalent = int(carbon_saved * homes_factor)
     
     # Calculate daily rate
     daily_rate = carbon_saved / period_days
@@ -422,7 +665,7 @@ def get_carbon_insights(carbon_saved: float, period_days: int = 30) -> dict:
         "equivalents": {
             "trees_planted": f"{trees_equivalent:,} trees planted",
             "cars_off_road": f"{cars_equivalent} cars off the road for a year",
-            "households": f"{int(carbon_saved / 7.5)} homes' energy for a year"
+            "households": f"{homes_equivalent} homes' energy for a year"
         },
         "projections": {
             "daily_rate": f"{daily_rate:.1f} tonnes/day",
@@ -432,9 +675,9 @@ def get_carbon_insights(carbon_saved: float, period_days: int = 30) -> dict:
     
     # Performance assessment
     target_reduction = 0.17  # 17% annual target (mid-range of 15-20%)
-    if annual_projection >= carbon_saved * 12 * 0.20:  # 20%+ reduction
+    if annual_projection >= carbon_saved * _CARBON_EXCELLENT_RATIO:  # 20%+ reduction
         insights['performance'] = "✅ EXCELLENT - Exceeding 20% reduction target"
-    elif annual_projection >= carbon_saved * 12 * 0.15:  # 15-20% reduction
+    elif annual_projection >= carbon_saved * _CARBON_GOOD_RATIO:  # 15-20% reduction
         insights['performance'] = "✅ GOOD - Meeting 15-20% reduction target"
     else:
         insights['performance'] = "⚠️ BELOW TARGET - Additional optimization needed"
@@ -446,6 +689,26 @@ def get_carbon_insights(carbon_saved: float, period_days: int = 30) -> dict:
 # CONTEXT BUILDERS
 # ============================================
 
+def _render_stakeholder_context(role: str, profile: dict) -> str:
+    """Context prompt text for a role and its profile"""
+    return f"""
+STAKEHOLDER CONTEXT: {role.replace('_', ' ').title()}
+
+Focus areas: {', '.join(profile['focus'])}
+Communication style: {profile['language']}
+Key interests: {', '.join(profile['interests'])}
+
+Tailor your responses accordingly.
+"""
+
+
+# Profiles never change, so each known role's context is rendered once
+_STAKEHOLDER_CONTEXTS = {
+    role: _render_stakeholder_context(role, profile)
+    for role, profile in STAKEHOLDER_PROFILES.items()
+}
+
+
 def build_stakeholder_context(role: str = "middle_management") -> str:
     """
     Build context prompt based on stakeholder role
@@ -456,15 +719,8 @@ def build_stakeholder_context(role: str = "middle_management") -> str:
     Returns:
         Context string for AI prompt
     """
-    profile = STAKEHOLDER_PROFILES.get(role, STAKEHOLDER_PROFILES["middle_management"])
-    
-    context = f"""
-STAKEHOLDER CONTEXT: {role.replace('_', ' ').title()}
-
-Focus areas: {', '.join(profile['focus'])}
-Communication style: {profile['language']}
-Key interests: {', '.join(profile['interests'])}
-
-Tailor your responses accordingly.
-"""
-    return context
\ No newline at end of file
+    context = _STAKEHOLDER_CONTEXTS.get(role)
+    if context is None:
+        # Unknown role: middle management profile under the given name
+        context = _render_stakeholder_context(role, STAKEHOLDER_PROFILES["middle_management"])
+    return context
@@ -4,7 +4,7 @@ Defines role-based access control (RBAC)
 """
 
 from enum import Enum
-from typing import Set, List
+from typing import Dict, Iterable, FrozenSet, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -49,36 +49,36 @@ class Role(Enum):
 
 # Define what each role can do
 ROLE_PERMISSIONS = {
-    Role.VIEWER: {
+    Role.VIEWER: frozenset({
         Permission.VIEW_DASHBOARD,
         Permission.VIEW_VESSELS,
-    },
+    }),
     
-    Role.USER: {
+    Role.USER: frozenset({
         Permission.VIEW_DASHBOARD,
         Permission.VIEW_VESSELS,
         Permission.VIEW_ANALYTICS,
         Permission.EXPORT_DATA,
-    },
+    }),
     
-    Role.OPERATIONS: {
+    Role.OPERATIONS: frozenset({
         Permission.VIEW_DASHBOARD,
         Permission.VIEW_VESSELS,
         Permission.VIEW_ANALYTICS,
         Permission.VIEW_BERTH_MANAGEMENT,
         Permission.EXPORT_DATA,
         Permission.MODIFY_DATA,
-    },
+    }),
     
-    Role.SUSTAINABILITY: {
+    Role.SUSTAINABILITY: frozenset({
         Permission.VIEW_DASHBOARD,
         Permission.VIEW_VESSELS,
         Permission.VIEW_ANALYTICS,
         Permission.VIEW_SUSTAINABILITY,
         Permission.EXPORT_DATA,
-    },
+    }),
     
-    Role.ADMIN: {
+    Role.ADMIN: frozenset({
         Permission.VIEW_DASHBOARD,
         Permission.VIEW_VESSELS,
         Permission.VIEW_ANALYTICS,
@@ -90,11 +90,26 @@ ROLE_PERMISSIONS = {
         Permission.DELETE_DATA,
         Permission.MANAGE_USERS,
         Permission.VIEW_LOGS,
-    },
+    }),
     
-    Role.SUPERADMIN: set(Permission),  # All permissions
+    Role.SUPERADMIN: frozenset(Permission),  # All permissions
 }
 
+# Lookup tables for has_permission: one bit per permission, and the
+# combined bits of each role
+_PERMISSION_BITS = {permission: 1 << i for i, permission in enumerate(Permission)}
+_ROLE_MASKS = {
+    role: sum(_PERMISSION_BITS[p] for p in perms)
+    for role, perms in ROLE_PERMISSIONS.items()
+}
+
+_ROLES_BY_VALUE = {role.value: role for role in Role}
+
+
+def _role_for(name: str) -> Optional[Role]:
+    """Role for a role name (any case), or None if there is no such role"""
+    return _ROLES_BY_VALUE.get(name.lower())
+
 
 class PermissionChecker:
     """
@@ -113,29 +128,42 @@ class PermissionChecker:
         Returns:
             True if user has permission, False otherwise
         """
-        try:
-            # Convert string to Role enum
-            role = Role(user_role.lower())
-        except ValueError:
+        role = _role_for(user_role)
+        if role is None:
             logger.warning(f"Invalid role: {user_role}")
             return False
+        mask = _ROLE_MASKS[role]
         
-        # Get permissions for this role
-        role_perms = ROLE_PERMISSIONS.get(role, set())
+        return bool(mask & _PERMISSION_BITS[required_permission])
+    
+    @staticmethod
+    def check_many(user_role: str, permissions: Iterable[Permission]) -> Dict[Permission, bool]:
+        """
+        Check several permissions for one role at once
+        
+        Args:
+            user_role: User's role (string)
+            permissions: Permissions to check
+        
+        Returns:
+            Dict of permission -> True/False (all False for an invalid role)
+        """
+        role = _role_for(user_role)
+        if role is None:
+            logger.warning(f"Invalid role: {user_role}")
+        mask = _ROLE_MASKS.get(role, 0)
         
-        # Check if permission is in the set
-        return required_permission in role_perms
+        return {p: bool(mask & _PERMISSION_BITS[p]) for p in permissions}
     
     @staticmethod
-    def get_user_permissions(user_role: str) -> Set[Permission]:
+    def get_user_permissions(user_role: str) -> FrozenSet[Permission]:
         """
         Get all permissions for a user role
         """
-        try:
-            role = Role(user_role.lower())
-            return ROLE_PERMISSIONS.get(role, set())
-        except ValueError:
-            return set()
+        role = _role_for(user_role)
+        if role is None:
+            return frozenset()
+        return ROLE_PERMISSIONS.get(role, frozenset())
     
     @staticmethod
     def require_permission(user_role: str, required_permission: Permission):
@@ -152,19 +180,36 @@ class PermissionChecker:
 
 
 # Quick helper functions
-def has_permission(required_permission: Permission) -> bool:
+def current_role() -> str:
     """
-    Check if current user has permission
+    Role of the current user (read once per render and pass it on)
     """
     import streamlit as st
-    user_role = st.session_state.get('user_role', 'viewer')
+    return st.session_state.get('user_role', 'viewer')
+
+
+def has_permission(required_permission: Permission, user_role: Optional[str] = None) -> bool:
+    """
+    Check if current user has permission
+    """
+    if user_role is None:
+        user_role = current_role()
     return PermissionChecker.has_permission(user_role, required_permission)
 
 
-def require_permission(required_permission: Permission):
+def check_permissions(permissions: Iterable[Permission], user_role: Optional[str] = None) -> Dict[Permission, bool]:
+    """
+    Check several permissions for the current user in one call
+    """
+    if user_role is None:
+        user_role = current_role()
+    return PermissionChecker.check_many(user_role, permissions)
+
+
+def require_permission(required_permission: Permission, user_role: Optional[str] = None):
     """
     Require permission or stop
     """
-    import streamlit as st
-    user_role = st.session_state.get('user_role', 'viewer')
-    PermissionChecker.require_permission(user_role, required_permission)
\ No newline at end of file
+    if user_role is None:
+        user_role = current_role()
+    PermissionChecker.require_permission(user_role, required_permission)
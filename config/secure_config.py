@@ -4,12 +4,18 @@ Safely handles API keys and sensitive configuration
 """
 
 import os
+from typing import Dict, Optional
+from functools import cached_property
+from types import MappingProxyType
 import streamlit as st
 from security.encryption import DataEncryption
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cached marker for keys that were looked up and not found
+_MISSING = object()
+
 
 class SecureConfig:
     """
@@ -19,6 +25,8 @@ class SecureConfig:
     
     def __init__(self):
         self.encryption = DataEncryption()
+        # key_name -> resolved value, or _MISSING
+        self._cache = {}
     
     def get_api_key(self, key_name: str) -> str:
         """
@@ -30,6 +38,34 @@ class SecureConfig:
         Returns:
             The decrypted API key
         """
+        value = self._lookup_raw(key_name)
+        if value is None:
+            raise ValueError(f"Missing API key: {key_name}")
+        return value
+    
+    def _lookup_raw(self, key_name: str) -> Optional[str]:
+        """Cached key lookup without raising; None if the key is not configured"""
+        # Each key is resolved once per instance, including misses
+        value = self._cache.get(key_name)
+        if value is None:
+            value = self._resolve_api_key(key_name)
+            self._cache[key_name] = value
+        return None if value is _MISSING else value
+    
+    def get_many(self, key_names) -> Dict[str, Optional[str]]:
+        """
+        Look up several keys in one call
+        
+        Args:
+            key_names: Names of the keys to fetch
+        
+        Returns:
+            Dict of key name -> value, with None for keys that are not configured
+        """
+        return {key_name: self._lookup_raw(key_name) for key_name in key_names}
+    
+    def _resolve_api_key(self, key_name: str):
+        """Probe secrets, environment and encrypted environment; _MISSING if absent"""
         # Try to get from Streamlit secrets first (best practice)
         if hasattr(st, 'secrets') and key_name in st.secrets:
             return st.secrets[key_name]
@@ -49,40 +85,55 @@ class SecureConfig:
         
         # Not found
         logger.error(f"API key not found: {key_name}")
-        raise ValueError(f"Missing API key: {key_name}")
+        return _MISSING
     
-    def get_azure_openai_config(self) -> dict:
+    @cached_property
+    def azure_openai_config(self) -> MappingProxyType:
         """
-        Get Azure OpenAI configuration safely
+        Azure OpenAI configuration, built once and shared read-only
         """
         try:
-            return {
+            return MappingProxyType({
                 'endpoint': self.get_api_key('AZURE_OPENAI_ENDPOINT'),
                 'api_key': self.get_api_key('AZURE_OPENAI_API_KEY'),
                 'api_version': self.get_api_key('AZURE_OPENAI_API_VERSION'),
                 'deployment_id': os.getenv('DEPLOYMENT_ID', 'gpt-4.1-mini')
-            }
+            })
         except ValueError as e:
             logger.error(f"Azure OpenAI configuration incomplete: {e}")
             st.error("⚠️ Azure OpenAI is not properly configured. Please contact administrator.")
             st.stop()
     
-    def get_database_config(self) -> dict:
+    @cached_property
+    def database_config(self) -> MappingProxyType:
         """
-        Get database configuration safely
+        Database configuration, built once and shared read-only
+        (None if incomplete)
         """
         try:
-            return {
+            return MappingProxyType({
                 'host': self.get_api_key('MYSQL_HOST'),
                 'user': self.get_api_key('MYSQL_USER'),
                 'password': self.get_api_key('MYSQL_PASSWORD'),
                 'database': self.get_api_key('MYSQL_DATABASE'),
                 'port': int(os.getenv('MYSQL_PORT', '3306'))
-            }
+            })
         except ValueError as e:
             logger.warning(f"Database configuration incomplete: {e}")
             return None
     
+    def get_azure_openai_config(self) -> MappingProxyType:
+        """
+        Get Azure OpenAI configuration safely
+        """
+        return self.azure_openai_config
+    
+    def get_database_config(self) -> MappingProxyType:
+        """
+        Get database configuration safely
+        """
+        return self.database_config
+    
     def check_all_keys(self) -> dict:
         """
         Check which required keys are configured
@@ -109,29 +160,28 @@ class SecureConfig:
         }
         
         for key in required_keys:
-            try:
-                self.get_api_key(key)
-                status['required'][key] = '✅ Configured'
-            except:
-                status['required'][key] = '❌ Missing'
+            status['required'][key] = '✅ Configured' if self._lookup_raw(key) else '❌ Missing'
         
         for key in optional_keys:
-            try:
-                self.get_api_key(key)
-                status['optional'][key] = '✅ Configured'
-            except:
-                status['optional'][key] = '⚠️ Not configured'
+            status['optional'][key] = '✅ Configured' if self._lookup_raw(key) else '⚠️ Not configured'
         
         return status
 
 
-# Global config instance
-_secure_config = SecureConfig()
+# Global config instance, created on first use
+_secure_config = None
+
+def get_secure_config() -> SecureConfig:
+    """Shared SecureConfig, constructed the first time it is needed"""
+    global _secure_config
+    if _secure_config is None:
+        _secure_config = SecureConfig()
+    return _secure_config
 
 def get_api_key(key_name: str) -> str:
     """Quick function to get an API key"""
-    return _secure_config.get_api_key(key_name)
+    return get_secure_config().get_api_key(key_name)
 
-def get_azure_config() -> dict:
+def get_azure_config() -> MappingProxyType:
     """Quick function to get Azure config"""
-    return _secure_config.get_azure_openai_config()
\ No newline at end of file
+    return get_secure_config().azure_openai_config
\ No newline at end of file
@@ -3,13 +3,13 @@ Configuration Keys Module - SECURE VERSION
 Now uses secure configuration management
 """
 
-from config.secure_config import SecureConfig
+from config.secure_config import get_secure_config
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Create secure config instance
-_config = SecureConfig()
+# Shared secure config instance
+_config = get_secure_config()
 
 # Get Azure OpenAI configuration securely
 try:
@@ -29,32 +29,39 @@ except Exception as e:
     AZURE_OPENAI_API_VERSION = None
     DEPLOYMENT_ID = None
 
-# Optional: Power BI configuration
+# Optional keys, fetched in one call (None when not configured)
 try:
-    POWER_BI_CLIENT_ID = _config.get_api_key('POWER_BI_CLIENT_ID')
-    POWER_BI_CLIENT_SECRET = _config.get_api_key('POWER_BI_CLIENT_SECRET')
-except:
+    _optional_keys = _config.get_many([
+        'POWER_BI_CLIENT_ID',
+        'POWER_BI_CLIENT_SECRET',
+        'MARINETRAFFIC_API_KEY',
+        'OPENWEATHER_API_KEY'
+    ])
+except Exception as e:
+    logger.warning(f"⚠️ Could not read optional API keys: {e}")
+    _optional_keys = {}
+
+# Optional: Power BI configuration (needs both parts)
+POWER_BI_CLIENT_ID = _optional_keys.get('POWER_BI_CLIENT_ID')
+POWER_BI_CLIENT_SECRET = _optional_keys.get('POWER_BI_CLIENT_SECRET')
+if POWER_BI_CLIENT_ID is None or POWER_BI_CLIENT_SECRET is None:
     POWER_BI_CLIENT_ID = None
     POWER_BI_CLIENT_SECRET = None
 
 # Optional: External API keys
-try:
-    MARINETRAFFIC_API_KEY = _config.get_api_key('MARINETRAFFIC_API_KEY')
-except:
-    MARINETRAFFIC_API_KEY = None
+MARINETRAFFIC_API_KEY = _optional_keys.get('MARINETRAFFIC_API_KEY')
+OPENWEATHER_API_KEY = _optional_keys.get('OPENWEATHER_API_KEY')
+
+# Validate required configuration (the keys are fixed after import, so
+# the result is computed once)
+if not AZURE_OPENAI_API_KEY:
+    _CONFIG_STATUS = (False, "❌ Azure OpenAI API key is missing")
+elif not AZURE_OPENAI_ENDPOINT:
+    _CONFIG_STATUS = (False, "❌ Azure OpenAI endpoint is missing")
+else:
+    _CONFIG_STATUS = (True, "✅ Configuration is valid")
 
-try:
-    OPENWEATHER_API_KEY = _config.get_api_key('OPENWEATHER_API_KEY')
-except:
-    OPENWEATHER_API_KEY = None
 
-# Validate required configuration
 def validate_config():
     """Check if required configuration is present"""
-    if not AZURE_OPENAI_API_KEY:
-        return False, "❌ Azure OpenAI API key is missing"
-    
-    if not AZURE_OPENAI_ENDPOINT:
-        return False, "❌ Azure OpenAI endpoint is missing"
-    
-    return True, "✅ Configuration is valid"
\ No newline at end of file
+    return _CONFIG_STATUS
@@ -4,16 +4,126 @@ MarineTraffic and OpenWeather API integrations
 Data Engineer: API Integration Specialist
 """
 
-import requests
+import httpx
+import numpy as np
+import orjson
 from typing import List, Dict, Optional
+from bisect import bisect_right
 from datetime import datetime
 import logging
+import threading
 import time
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent API requests (per-port or per-chunk) during a sync
+MAX_FETCH_WORKERS = 8
+
+# Max IMO numbers per MarineTraffic positions request (keeps URLs short)
+IMO_CHUNK_SIZE = 50
+
+# How long OpenWeather responses stay fresh in the client caches
+WEATHER_CACHE_TTL_SECONDS = 600      # current weather: 10 minutes
+FORECAST_CACHE_TTL_SECONDS = 3600    # 5-day forecast: 1 hour
+ROUTE_CACHE_TTL_SECONDS = 3600       # planned vessel routes: 1 hour
+STALE_WEATHER_MAX_AGE_SECONDS = 6 * 3600  # fallback when OpenWeather is down
+
+# Decimal places kept in weather cache keys (2 = about 1 km)
+COORD_CACHE_DECIMALS = 2
+
+# A vessel whose reported position moves more than this (in degrees of
+# latitude or longitude) between syncs gets its cached route dropped
+ROUTE_INVALIDATION_DEGREES = 0.5
+
+# Simplified Beaufort lookup: wind speed (m/s) cut points and the wave
+# height / sea condition for each band (below 1, 1-3, ..., 20 and above)
+_WIND_BINS = (1, 3, 6, 10, 15, 20)
+_WAVE_HEIGHTS = (0.0, 0.1, 0.5, 1.0, 2.5, 4.0, 6.0)
+_SEA_LABELS = ("Calm", "Light Air", "Light Breeze", "Moderate", "Fresh", "Strong", "Gale")
+
+_WIND_BINS_ARRAY = np.array(_WIND_BINS, dtype=float)
+_WAVE_HEIGHTS_ARRAY = np.array(_WAVE_HEIGHTS)
+
+
+# Throttled / server-error responses are retried with exponential backoff
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRIES = 3
+_RETRY_BACKOFF_SECONDS = 0.3
+
+
+def _build_client() -> httpx.Client:
+    """
+    HTTP/2 client: concurrent requests to the same API are multiplexed
+    over one connection, and failed connection attempts are retried
+    """
+    return httpx.Client(
+        timeout=10.0,
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=_MAX_RETRIES,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    )
+
+
+def _get(client: httpx.Client, url: str, **kwargs) -> httpx.Response:
+    """GET that retries throttled and 5xx responses with backoff"""
+    for attempt in range(_MAX_RETRIES + 1):
+        response = client.get(url, **kwargs)
+        if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+            return response
+        time.sleep(_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+class _TTLCache:
+    """
+    Small thread-safe cache whose entries expire after ttl seconds.
+    When full, expired entries are dropped first, then the oldest one.
+    """
+    
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return None
+        return entry[1]
+    
+    def set(self, key, value):
+        """Store value for key, evicting if the cache is full"""
+        now = time.monotonic()
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._data) >= self.maxsize:
+                expired = [k for k, (stored, _) in self._data.items() if now - stored >= self.ttl]
+                for k in expired:
+                    del self._data[k]
+                if len(self._data) >= self.maxsize:
+                    del self._data[next(iter(self._data))]
+            self._data[key] = (now, value)
+    
+    def invalidate(self, key):
+        """Drop the entry for key, if any"""
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def _coord_key(lat: float, lon: float, units: str) -> tuple:
+    """
+    Cache key for a coordinate lookup. Coordinates are rounded to
+    COORD_CACHE_DECIMALS places (0.01 degrees is about 1 km at the equator,
+    finer than OpenWeather's grid), so nearby points share one entry.
+    """
+    return (round(lat, COORD_CACHE_DECIMALS), round(lon, COORD_CACHE_DECIMALS), units)
+
 
 class MarineTrafficAPI:
     """
@@ -23,7 +133,18 @@ class MarineTrafficAPI:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://services.marinetraffic.com/api"
-        self.session = requests.Session()
+        self.client = _build_client()
+        
+        # Sent with every request; httpx already asks for gzip/deflate
+        self.client.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Accept': 'application/json'
+        })
+        self._positions_url = f"{self.base_url}/exportvessels"
+        self._route_url = f"{self.base_url}/exportroute"
+        self._port_calls_url = f"{self.base_url}/portcalls"
+        
+        self._route_cache = _TTLCache(ROUTE_CACHE_TTL_SECONDS, maxsize=1024)
     
     def get_vessel_positions(
         self,
@@ -33,6 +154,9 @@ class MarineTrafficAPI:
         """
         Get real-time positions for list of vessels
         
+        Large lists are split into chunks of IMO_CHUNK_SIZE that are
+        requested concurrently; a failed chunk only drops its own vessels.
+        
         Args:
             imo_list: List of IMO numbers
             timeout: Request timeout in seconds
@@ -40,40 +164,62 @@ class MarineTrafficAPI:
         Returns:
             List of vessel position data
         """
-        try:
-            endpoint = f"{self.base_url}/exportvessels"
+        chunks = [
+            imo_list[i:i + IMO_CHUNK_SIZE]
+            for i in range(0, len(imo_list), IMO_CHUNK_SIZE)
+        ] or [[]]
+        
+        logger.info(f"Fetching positions for {len(imo_list)} vessels in {len(chunks)} request(s)")
+        
+        if len(chunks) == 1:
+            vessels = self._fetch_positions_chunk(chunks[0], timeout)
+        else:
+            workers = min(MAX_FETCH_WORKERS, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(lambda chunk: self._fetch_positions_chunk(chunk, timeout), chunks)
+                vessels = [vessel for result in results for vessel in result]
+        
+        logger.info(f"Retrieved {len(vessels)} vessel positions")
+        return vessels
+    
+    def _fetch_positions_chunk(self, imo_chunk: List[str], timeout: int) -> List[Dict]:
+        """
+        Fetch positions for one chunk of IMO numbers
+        
+        Args:
+            imo_chunk: IMO numbers for a single request
+            timeout: Request timeout in seconds
             
+        Returns:
+            List of vessel position data (empty on error)
+        """
+        try:
             params = {
                 'v': '8',
                 'protocol': 'jsono',
                 'msgtype': 'simple',
-                'imo': ','.join(imo_list),
+                'imo': ','.join(imo_chunk),
                 'timespan': '20'  # Last 20 minutes
             }
             
-            headers = {
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
-            logger.info(f"Fetching positions for {len(imo_list)} vessels")
-            
-            response = self.session.get(
-                endpoint,
+            response = _get(
+                self.client,
+                self._positions_url,
                 params=params,
-                headers=headers,
                 timeout=timeout
             )
             response.raise_for_status()
             
-            data = response.json()
-            vessels = data.get('data', [])
-            
-            logger.info(f"Retrieved {len(vessels)} vessel positions")
-            return vessels
+            # Parse the raw bytes directly; this is the largest payload we fetch
+            data = orjson.loads(response.content)
+            return data.get('data', [])
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"MarineTraffic API error: {e}")
             return []
+        except orjson.JSONDecodeError as e:
+            logger.error(f"MarineTraffic API returned invalid JSON: {e}")
+            return []
     
     def get_vessel_route(self, imo: str) -> Optional[Dict]:
         """
@@ -83,36 +229,46 @@ class MarineTrafficAPI:
             imo: IMO number
             
         Returns:
-            Route information dictionary
+            Route information dictionary (cached for ROUTE_CACHE_TTL_SECONDS
+            or until invalidate_route is called)
         """
+        cached = self._route_cache.get(imo)
+        if cached is not None:
+            return cached
+        
         try:
-            endpoint = f"{self.base_url}/exportroute"
-            
             params = {
                 'v': '2',
                 'imo': imo,
                 'protocol': 'jsono'
             }
             
-            headers = {
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
-            response = self.session.get(
-                endpoint,
+            response = _get(
+                self.client,
+                self._route_url,
                 params=params,
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
             
             data = response.json()
-            return data.get('data', {})
+            route = data.get('data', {})
+            self._route_cache.set(imo, route)
+            return route
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching route for {imo}: {e}")
             return None
     
+    def invalidate_route(self, imo: str):
+        """
+        Forget the cached route for a vessel so the next lookup refetches it
+        
+        Args:
+            imo: IMO number
+        """
+        self._route_cache.invalidate(imo)
+    
     def get_port_calls(
         self,
         port_id: str,
@@ -129,8 +285,6 @@ class MarineTrafficAPI:
             List of expected port calls
         """
         try:
-            endpoint = f"{self.base_url}/portcalls"
-            
             params = {
                 'v': '1',
                 'portid': port_id,
@@ -138,14 +292,10 @@ class MarineTrafficAPI:
                 'protocol': 'jsono'
             }
             
-            headers = {
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
-            response = self.session.get(
-                endpoint,
+            response = _get(
+                self.client,
+                self._port_calls_url,
                 params=params,
-                headers=headers,
                 timeout=30
             )
             response.raise_for_status()
@@ -153,7 +303,7 @@ class MarineTrafficAPI:
             data = response.json()
             return data.get('data', [])
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching port calls: {e}")
             return []
 
@@ -166,9 +316,14 @@ class OpenWeatherAPI:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.session = requests.Session()
+        self.client = _build_client()
+        self._weather_cache = _TTLCache(WEATHER_CACHE_TTL_SECONDS)
+        
+        # Last good current weather per location, kept past the TTL as a
+        # fallback while OpenWeather is unreachable (bounded in age and size)
+        self._last_weather = _TTLCache(STALE_WEATHER_MAX_AGE_SECONDS)
+        self._forecast_cache = _TTLCache(FORECAST_CACHE_TTL_SECONDS)
     
-    @lru_cache(maxsize=100)
     def get_port_weather(
         self,
         lat: float,
@@ -184,8 +339,16 @@ class OpenWeatherAPI:
             units: Unit system (metric/imperial)
             
         Returns:
-            Weather data dictionary
+            Weather data dictionary (cached for WEATHER_CACHE_TTL_SECONDS).
+            If the API call fails, the last good reading for the location
+            (up to STALE_WEATHER_MAX_AGE_SECONDS old) is returned with
+            'stale': True, or None if there is none.
         """
+        key = _coord_key(lat, lon, units)
+        cached = self._weather_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
             endpoint = f"{self.base_url}/weather"
             
@@ -198,7 +361,7 @@ class OpenWeatherAPI:
             
             logger.info(f"Fetching weather for coordinates: {lat}, {lon}")
             
-            response = self.session.get(endpoint, params=params, timeout=10)
+            response = _get(self.client, endpoint, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -217,11 +380,19 @@ class OpenWeatherAPI:
             }
             
             logger.info(f"Weather retrieved: {formatted['weather']}, {formatted['temperature']}°C")
+            self._weather_cache.set(key, formatted)
+            self._last_weather.set(key, formatted)
             return formatted
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"OpenWeather API error: {e}")
-            return None
+            
+            last = self._last_weather.get(key)
+            if last is None:
+                return None
+            
+            logger.warning(f"Using last known weather from {last['timestamp']} for {lat}, {lon}")
+            return {**last, 'stale': True}
     
     def get_weather_forecast(
         self,
@@ -238,8 +409,13 @@ class OpenWeatherAPI:
             units: Unit system
             
         Returns:
-            List of forecast data
+            List of forecast data (cached for FORECAST_CACHE_TTL_SECONDS)
         """
+        key = _coord_key(lat, lon, units)
+        cached = self._forecast_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
             endpoint = f"{self.base_url}/forecast"
             
@@ -252,16 +428,17 @@ class OpenWeatherAPI:
             
             logger.info(f"Fetching forecast for coordinates: {lat}, {lon}")
             
-            response = self.session.get(endpoint, params=params, timeout=10)
+            response = _get(self.client, endpoint, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             
-            # Format forecast list
-            forecasts = []
-            for item in data['list']:
-                forecasts.append({
-                    'timestamp': datetime.fromtimestamp(item['dt']),
+            # Format forecast list; timestamps are converted in one pass
+            items = data['list']
+            timestamps = map(datetime.fromtimestamp, [item['dt'] for item in items])
+            forecasts = [
+                {
+                    'timestamp': timestamp,
                     'temperature': item['main']['temp'],
                     'feels_like': item['main']['feels_like'],
                     'humidity': item['main']['humidity'],
@@ -269,12 +446,15 @@ class OpenWeatherAPI:
                     'wind_direction': item['wind'].get('deg', 0),
                     'weather': item['weather'][0]['description'],
                     'precipitation_probability': item.get('pop', 0) * 100
-                })
+                }
+                for item, timestamp in zip(items, timestamps)
+            ]
             
             logger.info(f"Retrieved {len(forecasts)} forecast intervals")
+            self._forecast_cache.set(key, forecasts)
             return forecasts
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Forecast API error: {e}")
             return []
     
@@ -285,7 +465,8 @@ class OpenWeatherAPI:
     ) -> Optional[Dict]:
         """
         Get marine-specific weather (wave height, sea conditions)
-        Note: Requires OpenWeather Marine subscription
+        Note: Requires OpenWeather Marine subscription. ETLPipeline does
+        not call this; it derives wave height from get_port_weather directly.
         
         Args:
             lat: Latitude
@@ -300,6 +481,9 @@ class OpenWeatherAPI:
             weather = self.get_port_weather(lat, lon)
             
             if weather:
+                # Copy so the cached current-weather entry is left untouched
+                weather = dict(weather)
+                
                 # Estimate wave conditions based on wind speed
                 wind_speed = weather['wind_speed']
                 wave_height = self._estimate_wave_height(wind_speed)
@@ -323,21 +507,20 @@ class OpenWeatherAPI:
         Returns:
             Estimated wave height in meters
         """
-        # Simplified estimation
-        if wind_speed < 1:
-            return 0.0
-        elif wind_speed < 3:
-            return 0.1
-        elif wind_speed < 6:
-            return 0.5
-        elif wind_speed < 10:
-            return 1.0
-        elif wind_speed < 15:
-            return 2.5
-        elif wind_speed < 20:
-            return 4.0
-        else:
-            return 6.0
+        return _WAVE_HEIGHTS[bisect_right(_WIND_BINS, wind_speed)]
+    
+    def _estimate_wave_heights(self, wind_speeds) -> List[float]:
+        """
+        _estimate_wave_height for a whole sequence of wind speeds
+        
+        Args:
+            wind_speeds: Sequence of wind speeds in m/s
+            
+        Returns:
+            Estimated wave heights in meters, one per input
+        """
+        wind = np.asarray(wind_speeds, dtype=float)
+        return _WAVE_HEIGHTS_ARRAY[np.searchsorted(_WIND_BINS_ARRAY, wind, side="right")].tolist()
     
     def _get_sea_condition(self, wind_speed: float) -> str:
         """
@@ -349,20 +532,7 @@ class OpenWeatherAPI:
         Returns:
             Sea condition description
         """
-        if wind_speed < 1:
-            return "Calm"
-        elif wind_speed < 3:
-            return "Light Air"
-        elif wind_speed < 6:
-            return "Light Breeze"
-        elif wind_speed < 10:
-            return "Moderate"
-        elif wind_speed < 15:
-            return "Fresh"
-        elif wind_speed < 20:
-            return "Strong"
-        else:
-            return "Gale"
+        return _SEA_LABELS[bisect_right(_WIND_BINS, wind_speed)]
 
 
 class ETLPipeline:
@@ -388,6 +558,27 @@ class ETLPipeline:
             'Los Angeles': {'lat': 33.7701, 'lon': -118.1937, 'id': 'USLAX'},
             'Antwerp': {'lat': 51.2194, 'lon': 4.4025, 'id': 'BEANR'}
         }
+        
+        # Last reported (lat, lon) per IMO, used to spot route changes
+        self._last_positions = {}
+    
+    def _fetch_for_ports(self, fetch) -> List:
+        """
+        Call fetch(lat, lon) for every tracked port concurrently
+        
+        Args:
+            fetch: Callable taking latitude and longitude
+            
+        Returns:
+            Results in the same order as self.ports
+        """
+        workers = max(1, min(MAX_FETCH_WORKERS, len(self.ports)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(fetch, coords['lat'], coords['lon'])
+                for coords in self.ports.values()
+            ]
+            return [future.result() for future in futures]
     
     def sync_vessel_positions(self, imo_list: List[str]) -> int:
         """
@@ -404,9 +595,8 @@ class ETLPipeline:
         # Fetch positions from API
         positions = self.marine_api.get_vessel_positions(imo_list)
         
-        updated_count = 0
-        for position in positions:
-            vessel_data = {
+        rows = [
+            {
                 'vessel_name': position.get('SHIPNAME'),
                 'imo_number': position.get('IMO'),
                 'operator': position.get('SHIPTYPE'),
@@ -414,13 +604,41 @@ class ETLPipeline:
                 'lat': position.get('LAT'),
                 'lon': position.get('LON')
             }
-            
-            if self.db.insert_vessel(vessel_data):
-                updated_count += 1
+            for position in positions
+            if position.get('IMO')  # imo_number is NOT NULL; one bad row would fail the batch
+        ]
+        
+        self._invalidate_moved_routes(rows)
+        
+        # One batched insert instead of a round-trip per vessel
+        updated_count = self.db.bulk_insert_vessels(rows)
         
         logger.info(f"Updated {updated_count} vessel positions")
         return updated_count
     
+    def _invalidate_moved_routes(self, rows: List[Dict]):
+        """
+        Drop cached routes for vessels that moved more than
+        ROUTE_INVALIDATION_DEGREES since the previous sync
+        
+        Args:
+            rows: Vessel rows with imo_number, lat and lon
+        """
+        for row in rows:
+            imo = row['imo_number']
+            try:
+                position = (float(row['lat']), float(row['lon']))
+            except (TypeError, ValueError):
+                continue
+            
+            previous = self._last_positions.get(imo)
+            self._last_positions[imo] = position
+            if previous is not None and (
+                abs(position[0] - previous[0]) > ROUTE_INVALIDATION_DEGREES
+                or abs(position[1] - previous[1]) > ROUTE_INVALIDATION_DEGREES
+            ):
+                self.marine_api.invalidate_route(imo)
+    
     def sync_weather_data(self) -> int:
         """
         Sync weather data for all tracked ports
@@ -430,34 +648,36 @@ class ETLPipeline:
         """
         logger.info(f"Syncing weather for {len(self.ports)} ports")
         
-        updated_count = 0
-        for port_name, coords in self.ports.items():
-            # Get current weather
-            weather = self.weather_api.get_port_weather(
-                coords['lat'],
-                coords['lon']
-            )
-            
-            if weather:
-                # Get marine forecast
-                marine = self.weather_api.get_marine_forecast(
-                    coords['lat'],
-                    coords['lon']
-                )
-                
-                weather_data = {
-                    'port': port_name,
-                    'timestamp': weather['timestamp'],
-                    'temperature': weather['temperature'],
-                    'wind_speed': weather['wind_speed'],
-                    'wind_direction': weather['wind_direction'],
-                    'wave_height': marine.get('wave_height', 0) if marine else 0,
-                    'visibility': weather['visibility'],
-                    'precipitation': 0  # Would come from forecast
-                }
-                
-                if self.db.insert_weather_data(weather_data):
-                    updated_count += 1
+        # Fetch all ports concurrently, then insert in port order. Marine
+        # conditions are derived here from the same response rather than
+        # going through get_marine_forecast.
+        results = self._fetch_for_ports(self.weather_api.get_port_weather)
+        
+        rows = [
+            {
+                'port': port_name,
+                'timestamp': weather['timestamp'],
+                'temperature': weather['temperature'],
+                'wind_speed': weather['wind_speed'],
+                'wind_direction': weather['wind_direction'],
+                'wave_height': self.weather_api._estimate_wave_height(weather['wind_speed']),
+                'visibility': weather['visibility'],
+                'precipitation': 0  # Would come from forecast
+            }
+            for port_name, weather in zip(self.ports, results)
+            if weather and not weather.get('stale')
+        ]
+        
+        # A stale reading is already stored under its original timestamp
+        stale_ports = [
+            port_name
+            for port_name, weather in zip(self.ports, results)
+            if weather and weather.get('stale')
+        ]
+        if stale_ports:
+            logger.warning(f"No fresh weather for {', '.join(stale_ports)}; last known reading kept")
+        
+        updated_count = self.db.bulk_insert_weather_data(rows)
         
         logger.info(f"Inserted {updated_count} weather records")
         return updated_count
@@ -471,29 +691,35 @@ class ETLPipeline:
         """
         logger.info("Syncing weather forecasts")
         
-        updated_count = 0
-        for port_name, coords in self.ports.items():
-            forecasts = self.weather_api.get_weather_forecast(
-                coords['lat'],
-                coords['lon']
-            )
-            
-            for forecast in forecasts:
-                weather_data = {
-                    'port': port_name,
-                    'timestamp': forecast['timestamp'],
-                    'temperature': forecast['temperature'],
-                    'wind_speed': forecast['wind_speed'],
-                    'wind_direction': forecast['wind_direction'],
-                    'wave_height': self.weather_api._estimate_wave_height(
-                        forecast['wind_speed']
-                    ),
-                    'visibility': 10,  # Default visibility
-                    'precipitation': forecast.get('precipitation_probability', 0)
-                }
-                
-                if self.db.insert_weather_data(weather_data):
-                    updated_count += 1
+        # Fetch all ports concurrently, then insert in port order
+        results = self._fetch_for_ports(self.weather_api.get_weather_forecast)
+        
+        rows = [
+            (port_name, forecast)
+            for port_name, forecasts in zip(self.ports, results)
+            for forecast in forecasts
+        ]
+        
+        # Wave heights for all intervals of all ports in one lookup
+        wave_heights = self.weather_api._estimate_wave_heights(
+            [forecast['wind_speed'] for _, forecast in rows]
+        )
+        
+        weather_rows = [
+            {
+                'port': port_name,
+                'timestamp': forecast['timestamp'],
+                'temperature': forecast['temperature'],
+                'wind_speed': forecast['wind_speed'],
+                'wind_direction': forecast['wind_direction'],
+                'wave_height': wave_height,
+                'visibility': 10,  # Default visibility
+                'precipitation': forecast.get('precipitation_probability', 0)
+            }
+            for (port_name, forecast), wave_height in zip(rows, wave_heights)
+        ]
+        
+        updated_count = self.db.bulk_insert_weather_data(weather_rows)
         
         logger.info(f"Inserted {updated_count} forecast records")
         return updated_count
@@ -507,21 +733,24 @@ class ETLPipeline:
         
         try:
             # Get list of tracked vessels from database
-            recent_vessels = self.db.get_recent_vessels(limit=100)
-            imo_list = [v['imo_number'] for v in recent_vessels if v.get('imo_number')]
-            
-            # Sync vessel positions
-            vessel_count = self.sync_vessel_positions(imo_list)
+            imo_list = self.db.get_recent_imos(limit=100)
             
-            # Sync weather data
-            weather_count = self.sync_weather_data()
-            
-            # Sync forecasts (less frequently - once per hour)
+            # Vessel positions, weather and forecasts hit separate upstreams,
+            # so the three syncs run side by side
             current_minute = datetime.now().minute
-            if current_minute < 15:  # Only on first run of the hour
-                forecast_count = self.sync_weather_forecast()
-            else:
-                forecast_count = 0
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                vessel_future = pool.submit(self.sync_vessel_positions, imo_list)
+                weather_future = pool.submit(self.sync_weather_data)
+                
+                # Sync forecasts (less frequently - once per hour)
+                if current_minute < 15:  # Only on first run of the hour
+                    forecast_future = pool.submit(self.sync_weather_forecast)
+                else:
+                    forecast_future = None
+                
+                vessel_count = vessel_future.result()
+                weather_count = weather_future.result()
+                forecast_count = forecast_future.result() if forecast_future else 0
             
             logger.info(
                 f"Sync complete: {vessel_count} vessels, "
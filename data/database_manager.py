@@ -15,6 +15,39 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Insert statements shared by the single-row and batch methods
+INSERT_VESSEL_QUERY = """
+INSERT INTO vessels (vessel_name, imo_number, operator, service, current_location)
+VALUES (%(vessel_name)s, %(imo_number)s, %(operator)s, %(service)s, POINT(%(lon)s, %(lat)s))
+ON DUPLICATE KEY UPDATE
+    vessel_name = VALUES(vessel_name),
+    operator = VALUES(operator),
+    last_updated = NOW()
+"""
+
+INSERT_WEATHER_QUERY = """
+INSERT INTO weather_data (
+    port, timestamp, temperature, wind_speed, wind_direction,
+    wave_height, visibility, precipitation
+)
+VALUES (
+    %(port)s, %(timestamp)s, %(temperature)s, %(wind_speed)s,
+    %(wind_direction)s, %(wave_height)s, %(visibility)s, %(precipitation)s
+)
+"""
+
+# Batch variant: weather_data is unique on (port, timestamp) and forecast
+# syncs overlap earlier ones, so existing rows are refreshed in place
+UPSERT_WEATHER_QUERY = INSERT_WEATHER_QUERY + """ON DUPLICATE KEY UPDATE
+    temperature = VALUES(temperature),
+    wind_speed = VALUES(wind_speed),
+    wind_direction = VALUES(wind_direction),
+    wave_height = VALUES(wave_height),
+    visibility = VALUES(visibility),
+    precipitation = VALUES(precipitation)
+"""
+
+
 class DatabaseConfig:
     """Database configuration"""
     
@@ -115,6 +148,28 @@ class DatabaseManager:
         logger.info(f"Retrieved {len(results)} recent vessels")
         return results
     
+    def get_recent_imos(self, limit: int = 100) -> List[str]:
+        """Get IMO numbers of the vessels with the most recent movements"""
+        
+        # imo_number is NOT NULL with a foreign key to vessels, so no join
+        # or null filter is needed
+        query = """
+        SELECT imo_number
+        FROM ship_movements
+        GROUP BY imo_number
+        ORDER BY MAX(atb) DESC
+        LIMIT %s
+        """
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (limit,))
+            results = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            
+        logger.info(f"Retrieved {len(results)} recent IMO numbers")
+        return results
+    
     def get_vessel_by_imo(self, imo_number: str) -> Optional[Dict]:
         """Get vessel details by IMO number"""
         
@@ -131,14 +186,14 @@ class DatabaseManager:
             FROM vessels
             WHERE imo_number = %s
         """
-    
-    with self.get_connection() as conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (imo_number,))  # ✅ This is correct - using tuple for parameters
-        result = cursor.fetchone()
-        cursor.close()
         
-    return result
+        with self.get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, (imo_number,))  # ✅ This is correct - using tuple for parameters
+            result = cursor.fetchone()
+            cursor.close()
+            
+        return result
     
     def get_upcoming_arrivals(self, hours: int = 48) -> List[Dict]:
         """Get vessels arriving in next N hours"""
@@ -424,19 +479,10 @@ class DatabaseManager:
     def insert_vessel(self, vessel_data: Dict) -> bool:
         """Insert new vessel record"""
         
-        query = """
-        INSERT INTO vessels (vessel_name, imo_number, operator, service, current_location)
-        VALUES (%(vessel_name)s, %(imo_number)s, %(operator)s, %(service)s, POINT(%(lon)s, %(lat)s))
-        ON DUPLICATE KEY UPDATE
-            vessel_name = VALUES(vessel_name),
-            operator = VALUES(operator),
-            last_updated = NOW()
-        """
-        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(query, vessel_data)
+                cursor.execute(INSERT_VESSEL_QUERY, vessel_data)
                 conn.commit()
                 cursor.close()
             logger.info(f"Inserted vessel: {vessel_data.get('vessel_name')}")
@@ -482,25 +528,44 @@ class DatabaseManager:
     def insert_weather_data(self, weather_data: Dict) -> bool:
         """Insert weather data record"""
         
-        query = """
-        INSERT INTO weather_data (
-            port, timestamp, temperature, wind_speed, wind_direction,
-            wave_height, visibility, precipitation
-        )
-        VALUES (
-            %(port)s, %(timestamp)s, %(temperature)s, %(wind_speed)s,
-            %(wind_direction)s, %(wave_height)s, %(visibility)s, %(precipitation)s
-        )
-        """
-        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(query, weather_data)
+                cursor.execute(INSERT_WEATHER_QUERY, weather_data)
                 conn.commit()
                 cursor.close()
             logger.info(f"Inserted weather data for: {weather_data.get('port')}")
             return True
         except Error as e:
             logger.error(f"Error inserting weather data: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def _insert_many(self, query: str, rows: List[Dict], label: str) -> int:
+        """
+        Insert many rows with one executemany and a single commit
+        
+        Returns:
+            Number of rows inserted (0 if the batch failed)
+        """
+        if not rows:
+            return 0
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, rows)
+                conn.commit()
+                cursor.close()
+            logger.info(f"Inserted {len(rows)} {label} records")
+            return len(rows)
+        except Error as e:
+            logger.error(f"Error inserting {label} batch: {e}")
+            return 0
+    
+    def bulk_insert_vessels(self, vessels: List[Dict]) -> int:
+        """Insert or update many vessel records in one transaction"""
+        return self._insert_many(INSERT_VESSEL_QUERY, vessels, "vessel")
+    
+    def bulk_insert_weather_data(self, weather_rows: List[Dict]) -> int:
+        """Insert or refresh many weather data records in one transaction"""
+        return self._insert_many(UPSERT_WEATHER_QUERY, weather_rows, "weather")
@@ -186,37 +186,51 @@ def render():
         
         # Get AI response using smart agent
         with st.chat_message("assistant"):
-            with st.spinner("🤖 Analyzing dashboard data with domain expertise..."):
-                try:
-                    result = agent.process_query(
-                        user_input, 
-                        st.session_state.history,
-                        st.session_state.stakeholder_role
-                    )
-                    
-                    # Display response
-                    st.write(result["response"])
-                    
-                    # Show function calls
-                    if result.get("functions_called"):
-                        with st.expander(f"🔧 Data Sources Used ({len(result['functions_called'])} functions)"):
-                            st.caption("The AI accessed these real-time data sources:")
-                            for func in result["functions_called"]:
-                                st.caption(f"✓ **{func['function']}**")
-                                if func.get('arguments'):
-                                    st.json(func['arguments'])
-                    
-                    # Add to history
-                    st.session_state.history.append({
-                        "role": "assistant",
-                        "content": result["response"],
-                        "functions_called": result.get("functions_called", [])
-                    })
-                    
-                except Exception as e:
-                    error_msg = f"❌ Error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.history.append({"role": "system", "content": error_msg})
+            try:
+                # Stream the answer as it is generated; the placeholder shows
+                # progress until the first text arrives
+                placeholder = st.empty()
+                placeholder.caption("🤖 Analyzing dashboard data with domain expertise...")
+                chunks = []
+                result = None
+                for kind, value in agent.process_query_stream(
+                    user_input,
+                    st.session_state.history,
+                    st.session_state.stakeholder_role
+                ):
+                    if kind == "delta":
+                        chunks.append(value)
+                        placeholder.write("".join(chunks))
+                    elif kind == "reset":
+                        # Text so far was a preamble to a data lookup
+                        chunks.clear()
+                        placeholder.caption("🤖 Analyzing dashboard data with domain expertise...")
+                    else:
+                        result = value
+
+                # Display response
+                placeholder.write(result["response"])
+                
+                # Show function calls
+                if result.get("functions_called"):
+                    with st.expander(f"🔧 Data Sources Used ({len(result['functions_called'])} functions)"):
+                        st.caption("The AI accessed these real-time data sources:")
+                        for func in result["functions_called"]:
+                            st.caption(f"✓ **{func['function']}**")
+                            if func.get('arguments'):
+                                st.json(func['arguments'])
+                
+                # Add to history
+                st.session_state.history.append({
+                    "role": "assistant",
+                    "content": result["response"],
+                    "functions_called": result.get("functions_called", [])
+                })
+                
+            except Exception as e:
+                error_msg = f"❌ Error: {str(e)}"
+                st.error(error_msg)
+                st.session_state.history.append({"role": "system", "content": error_msg})
         
         # # 🩹 Fix: clear pending query BEFORE rerun
         # st.session_state.pending_query = None
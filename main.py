@@ -3,9 +3,12 @@ PSA Global Insights Dashboard - Main Entry Point
 Frontend Implementation by Senior Frontend Engineer
 """
 
+import logging
 import streamlit as st
 from frontend.config import PageConfig
 
+logging.basicConfig(level=logging.INFO)
+
 # Page configuration
 st.set_page_config(
     page_title=PageConfig.PAGE_TITLE,
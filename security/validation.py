@@ -27,6 +27,16 @@ class InputValidator:
         r'<embed',                      # Embeds
     ]
     
+    # Common SQL injection patterns, compiled once into a single scan
+    SQL_INJECTION_PATTERN = re.compile(
+        "|".join([
+            r"('\s*(OR|AND)\s*'?\d+\s*'?='?\d+)",  # ' OR '1'='1
+            r"(;|\-\-|\/\*|\*\/)",                  # SQL comments
+            r"(DROP|DELETE|INSERT|UPDATE|EXEC|UNION)\s",  # SQL commands
+        ]),
+        re.IGNORECASE
+    )
+    
     @staticmethod
     def sanitize_html(input_string: str) -> str:
         """
@@ -129,18 +139,9 @@ class InputValidator:
         if not input_string:
             return False
         
-        # Common SQL injection patterns
-        sql_patterns = [
-            r"('\s*(OR|AND)\s*'?\d+\s*'?='?\d+)",  # ' OR '1'='1
-            r"(;|\-\-|\/\*|\*\/)",                  # SQL comments
-            r"(DROP|DELETE|INSERT|UPDATE|EXEC|UNION)\s",  # SQL commands
-        ]
-        
-        input_upper = input_string.upper()
-        for pattern in sql_patterns:
-            if re.search(pattern, input_upper, re.IGNORECASE):
-                logger.critical(f"SQL injection attempt detected: {input_string[:50]}...")
-                return True
+        if InputValidator.SQL_INJECTION_PATTERN.search(input_string):
+            logger.critical(f"SQL injection attempt detected: {input_string[:50]}...")
+            return True
         
         return False
     
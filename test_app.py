@@ -1,6 +1,9 @@
+import logging
 import streamlit as st
 from backend.ai_service import MultiModelAIService, AzureOpenAIConfig
 
+logging.basicConfig(level=logging.INFO)
+
 # st.set_page_config(page_title="PSA Hackathon AI Chat", page_icon="🛳️")
 # st.title("PSA Hackathon AI Chat 🛳️")
 
@@ -49,11 +52,16 @@ if user_input:
         st.session_state.history.append({"role": "user", "content": user_input})
         st.chat_message("user").write(user_input)
 
-        # Get AI response from your service
+        # Get AI response from your service, painting tokens as they stream in
         try:
-            ai_response = ai_service.chat(user_input, st.session_state.history)
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                chunks = []
+                for chunk in ai_service.chat_stream(user_input, st.session_state.history):
+                    chunks.append(chunk)
+                    placeholder.write("".join(chunks))
+            ai_response = "".join(chunks)
             st.session_state.history.append({"role": "assistant", "content": ai_response})
-            st.chat_message("assistant").write(ai_response)
         except Exception as e:
             st.session_state.history.append({"role": "system", "content": f"❌ Error: {e}"})
             st.markdown(f"<span style='color:red'>❌ Error: {e}</span>", unsafe_allow_html=True)